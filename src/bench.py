@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from block_types import BlockType, block_type_from_lines
+from corpus import write_corpus
+from markdown_blocks import scan_blocks
+from markdown_to_html import blocks_to_html_node
+from split_nodes import text_to_textnodes
+from template import Template
+
+TEMPLATE = "<!doctype html><title>{{ Title }}</title><article>{{ Content }}</article>"
+
+# Stages that together make up a page build, in order
+PIPELINE_STAGES = ("read", "blocks", "tree", "to_html", "template", "write")
+# Parts of the pipeline re-measured on their own: block typing happens inside
+# "blocks" and inline parsing inside "tree"
+DETAIL_STAGES = ("block_types", "inline")
+STAGES = PIPELINE_STAGES + DETAIL_STAGES
+
+
+def run_once(paths, dest_dir):
+    timings = dict.fromkeys(STAGES, 0.0)
+    template = Template(TEMPLATE)
+    clock = time.perf_counter
+
+    for i, path in enumerate(paths):
+        start = clock()
+        with open(path, "r") as f:
+            markdown = f.read()
+        now = clock()
+        timings["read"] += now - start
+
+        start = now
+        blocks = list(scan_blocks(markdown.split("\n")))
+        now = clock()
+        timings["blocks"] += now - start
+
+        start = now
+        for block in blocks:
+            block_type_from_lines(block.lines)
+        now = clock()
+        timings["block_types"] += now - start
+
+        start = now
+        for block in blocks:
+            if block.block_type != BlockType.CODE:
+                text_to_textnodes(block.text)
+        now = clock()
+        timings["inline"] += now - start
+
+        start = now
+        # Without the fragment cache, so blocks become a node tree here and
+        # are turned into HTML in the to_html stage
+        node = blocks_to_html_node(blocks, cache=None)
+        now = clock()
+        timings["tree"] += now - start
+
+        start = now
+        content = node.to_html()
+        now = clock()
+        timings["to_html"] += now - start
+
+        start = now
+        html = template.render({"Title": path, "Content": content})
+        now = clock()
+        timings["template"] += now - start
+
+        start = now
+        with open(os.path.join(dest_dir, f"{i}.html"), "w") as f:
+            f.write(html)
+        timings["write"] += clock() - start
+
+    return timings
+
+
+def run_benchmark(paths, dest_dir, repeat=3):
+    # Best of repeat runs, taken per stage
+    best = dict.fromkeys(STAGES, float("inf"))
+    for _ in range(repeat):
+        for stage, seconds in run_once(paths, dest_dir).items():
+            best[stage] = min(best[stage], seconds)
+
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    megabytes = total_bytes / 1_000_000
+    stages = {
+        stage: {"seconds": seconds, "mb_per_sec": megabytes / seconds}
+        for stage, seconds in best.items()
+    }
+    total = sum(best[stage] for stage in PIPELINE_STAGES)
+    return {
+        "pages": len(paths),
+        "bytes": total_bytes,
+        "stages": stages,
+        "total": {
+            "seconds": total,
+            "mb_per_sec": megabytes / total,
+            "pages_per_sec": len(paths) / total,
+        },
+    }
+
+
+def compare_results(results, baseline, threshold=0.1):
+    # Throughput is compared so runs over differently sized corpora line up.
+    # Returns (stage, baseline MB/s, current MB/s, regressed) rows.
+    rows = []
+    names = list(results["stages"]) + ["total"]
+    for name in names:
+        current = lookup(results, name)
+        previous = lookup(baseline, name)
+        if current is None or previous is None:
+            continue
+        regressed = current["mb_per_sec"] < previous["mb_per_sec"] * (1 - threshold)
+        rows.append((name, previous["mb_per_sec"], current["mb_per_sec"], regressed))
+    return rows
+
+
+def lookup(results, name):
+    if name == "total":
+        return results.get("total")
+    return results.get("stages", {}).get(name)
+
+
+def print_results(results):
+    print(f"{results['pages']} pages, {results['bytes'] / 1_000_000:.2f} MB")
+    print(f"{'stage':>12} {'seconds':>10} {'MB/s':>10}")
+    for stage in STAGES:
+        if stage == DETAIL_STAGES[0]:
+            print("  re-measured on their own:")
+        entry = results["stages"][stage]
+        print(f"{stage:>12} {entry['seconds']:>10.4f} {entry['mb_per_sec']:>10.2f}")
+    total = results["total"]
+    print(
+        f"{'total':>12} {total['seconds']:>10.4f} {total['mb_per_sec']:>10.2f} "
+        f"({total['pages_per_sec']:.1f} pages/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark each build stage over a synthetic corpus"
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=20_000,
+        help="approximate characters per page",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--adversarial",
+        action="store_true",
+        help="generate pathological markdown instead of realistic posts",
+    )
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fractional throughput drop that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        dest_dir = os.path.join(tmp, "docs")
+        os.makedirs(dest_dir)
+        paths = write_corpus(
+            content_dir, args.pages, args.page_size, args.seed, args.adversarial
+        )
+        results = run_benchmark(paths, dest_dir, args.repeat)
+
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = 0
+        print(f"{'stage':>12} {'baseline':>10} {'current':>10} {'change':>8}")
+        for name, previous, current, regressed in compare_results(
+            results, baseline, args.threshold
+        ):
+            change = (current - previous) / previous * 100
+            flag = "  REGRESSION" if regressed else ""
+            print(
+                f"{name:>12} {previous:>10.2f} {current:>10.2f} {change:>7.1f}%{flag}"
+            )
+            regressions += regressed
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
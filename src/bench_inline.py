@@ -0,0 +1,68 @@
+import argparse
+import time
+from split_nodes import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+SCENARIOS = {
+    "mixed": (
+        "Some **bold** words, an _italic_ aside, `inline code`, "
+        "an ![image](/images/a.png) and a [link](https://example.com/page). "
+    ),
+    # Link-heavy index pages are where the split chain goes quadratic
+    "links": "[post](/blog/post/) ",
+}
+
+
+def text_to_textnodes_multipass(text):
+    # The previous five-pass split chain, kept here as the comparison baseline
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return [node for node in nodes if node.text]
+
+
+def best_time(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the single-pass inline parser with the split chain"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':>8} {'repeats':>8} {'bytes':>10} "
+        f"{'multipass':>12} {'single':>12} {'speedup':>8}"
+    )
+    for name, sentence in SCENARIOS.items():
+        for size in args.sizes:
+            text = sentence * size
+            if text_to_textnodes(text) != text_to_textnodes_multipass(text):
+                raise ValueError(f"Parsers disagree on the {name} text")
+
+            multipass = best_time(text_to_textnodes_multipass, text, args.repeat)
+            single = best_time(text_to_textnodes, text, args.repeat)
+            print(
+                f"{name:>8} {size:>8} {len(text):>10} {multipass * 1000:>10.2f}ms "
+                f"{single * 1000:>10.2f}ms {multipass / single:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
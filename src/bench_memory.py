@@ -0,0 +1,100 @@
+import argparse
+import gc
+import random
+import tracemalloc
+from corpus import generate_markdown
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html import markdown_to_html_node
+from textnode import TextNode, TextType
+
+
+# Subclasses without __slots__ get a per-instance __dict__ back, which is
+# what every node carried before the classes were slotted
+class DictTextNode(TextNode):
+    pass
+
+
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+def measure(factory, count):
+    # Returns (bytes per object, allocations per object) for count objects
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = snapshot_after.compare_to(snapshot_before, "filename")
+    allocations = sum(stat.count_diff for stat in stats)
+    del objects
+    return (after - before) / count, allocations / count
+
+
+def measure_page(markdown):
+    # Peak traced memory while building and rendering one page's tree
+    gc.collect()
+    tracemalloc.start()
+    # The fragment cache would leave a leaf of finished HTML per block, and
+    # fill the global cache instead of measuring the tree
+    node = markdown_to_html_node(markdown, cache=None)
+    node.to_html()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure per-node memory of slotted vs dict-backed nodes"
+    )
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cases = [
+        (
+            "TextNode",
+            lambda i: TextNode("word", TextType.TEXT),
+            lambda i: DictTextNode("word", TextType.TEXT),
+        ),
+        (
+            "LeafNode",
+            lambda i: LeafNode("b", "word"),
+            lambda i: DictLeafNode("b", "word"),
+        ),
+        (
+            "ParentNode",
+            lambda i: ParentNode("p", []),
+            lambda i: DictParentNode("p", []),
+        ),
+    ]
+
+    print(f"{'node':>10} {'dict B':>8} {'slots B':>8} {'saved':>7} {'allocs':>12}")
+    for name, slotted, unslotted in cases:
+        dict_bytes, dict_allocs = measure(unslotted, args.count)
+        slot_bytes, slot_allocs = measure(slotted, args.count)
+        print(
+            f"{name:>10} {dict_bytes:>8.1f} {slot_bytes:>8.1f} "
+            f"{(1 - slot_bytes / dict_bytes) * 100:>6.1f}% "
+            f"{dict_allocs:>5.2f} -> {slot_allocs:.2f}"
+        )
+
+    markdown = generate_markdown(args.page_size, random.Random(0))
+    peak = measure_page(markdown)
+    print(
+        f"Peak memory rendering a {len(markdown) / 1_000_000:.1f} MB page: "
+        f"{peak / 1_000_000:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
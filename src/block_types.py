@@ -11,8 +11,10 @@ class BlockType(Enum):
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return block_type_from_lines(block.split("\n"))
 
+
+def block_type_from_lines(lines):
     # Check for heading
     if lines[0].startswith("#"):
         header_count = 0
@@ -21,11 +23,11 @@ def block_to_block_type(block):
                 header_count += 1
             else:
                 break
-        if 1 <= header_count <= 6 and lines[0][header_count] == " ":
+        if 1 <= header_count <= 6 and lines[0].startswith(" ", header_count):
             return BlockType.HEADING
 
     # Check for code block
-    if block.startswith("```") and block.endswith("```"):
+    if lines[0].startswith("```") and lines[-1].endswith("```"):
         return BlockType.CODE
 
     # Check for quote
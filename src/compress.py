@@ -0,0 +1,156 @@
+import gzip
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from copy_static import walk_files
+from depgraph import COMPRESSED, INCOMPRESSIBLE
+from manifest import hash_file
+from publish import remove_quietly
+
+try:
+    # Python 3.14+
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Outputs worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".htm",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".md",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 19
+# zlib, zstd and hashlib release the GIL on large buffers, so threads keep
+# every core busy without pickling file contents to worker processes
+COMPRESS_THREADS = os.cpu_count() or 1
+
+
+def gzip_compress(data):
+    # A zero mtime keeps the output identical across builds
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def zstd_compress(data):
+    if zstd is not None:
+        return zstd.compress(data, level=ZSTD_LEVEL)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def available_formats():
+    # (sibling extension, compress function) pairs this Python can produce
+    formats = [(".gz", gzip_compress)]
+    if zstd is not None or zstandard is not None:
+        formats.append((".zst", zstd_compress))
+    return formats
+
+
+def compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def compress_outputs(root="docs", graph=None, formats=None, threads=None):
+    # Writes a precompressed sibling (index.html.gz, index.html.zst) next to
+    # every compressible file under root, so a server can send it as is.
+    # With a dependency graph, outputs whose hash matches the one their
+    # siblings were made from are skipped, including ones whose siblings came
+    # out no smaller, and siblings whose output is gone are removed.
+    # Returns {path: [sibling paths written]}.
+    start = time.perf_counter()
+    if formats is None:
+        formats = available_formats()
+
+    # Sibling path -> (hash of the output it was made from, whether it was
+    # written rather than skipped for coming out no smaller)
+    known = {}
+    removed = 0
+    if graph is not None:
+        for kind, has_file in ((COMPRESSED, True), (INCOMPRESSIBLE, False)):
+            for sibling, source, digest in graph.edges(kind):
+                if os.path.exists(source):
+                    known[sibling] = (digest, has_file)
+                    continue
+                graph.remove_output(sibling)
+                if has_file and os.path.isfile(sibling):
+                    print(f"Removing orphaned file: {sibling}")
+                    os.remove(sibling)
+                    removed += 1
+
+    paths = [path for path, _ in walk_files(root) if compressible(path)]
+
+    def compress(path):
+        return path, *compress_output(path, formats, known)
+
+    results = {}
+    skipped = 0
+    written = Counter()
+    with ThreadPoolExecutor(
+        max_workers=threads or COMPRESS_THREADS, thread_name_prefix="ssg-compress"
+    ) as executor:
+        for path, digest, siblings in executor.map(compress, paths):
+            if siblings is None:
+                skipped += 1
+                continue
+            results[path] = siblings
+            if graph is not None:
+                # Siblings not worth writing are recorded too, so the output
+                # is not compressed again until it changes
+                for extension, _ in formats:
+                    sibling = path + extension
+                    graph.record_compressed(sibling, path, digest, sibling in siblings)
+            written.update(os.path.splitext(sibling)[1] for sibling in siblings)
+
+    counts = ", ".join(f"{count} {ext}" for ext, count in sorted(written.items()))
+    print(
+        f"Compressed {len(results)} file(s) in {time.perf_counter() - start:.2f}s"
+        f"{': ' + counts if counts else ''}; {skipped} unchanged, {removed} removed"
+    )
+    return results
+
+
+def compress_output(path, formats, known=None):
+    # Returns (hash of path, sibling paths written), or (hash, None) when
+    # every sibling is already up to date. Siblings that would be no smaller
+    # than the original are not written, and any old one is removed.
+    digest = hash_file(path)
+    if known and all(
+        known.get(path + extension) == (digest, os.path.exists(path + extension))
+        for extension, _ in formats
+    ):
+        return digest, None
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    siblings = []
+    for extension, compress in formats:
+        sibling = path + extension
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            remove_quietly(sibling)
+            continue
+        tmp_path = f"{sibling}.ssg-tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        # The sibling carries its original's mtime, so a server can tell a
+        # sibling left behind by an older build from a current one
+        shutil.copystat(path, tmp_path)
+        os.replace(tmp_path, sibling)
+        siblings.append(sibling)
+    return digest, siblings
@@ -1,8 +1,22 @@
 import os
 import shutil
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+from publish import link_duplicates, publish_file, remove_siblings
 
 
-def copy_static():
+# Copy workers; most of each copy is spent waiting on the filesystem, so a
+# few threads overlap that latency without any page-rendering cost
+COPY_THREADS = 8
+# Seconds between progress lines for long copies
+PROGRESS_INTERVAL = 1.0
+
+
+def copy_static(link=False):
+    # With link, assets are hardlinked to static/ where possible and
+    # identical assets share one file
     source = "static"
     dest = "docs"
 
@@ -16,18 +30,163 @@ def copy_static():
     print(f"Created directory: {dest}")
 
     # Recursively copy all files
-    copy_directory_contents(source, dest)
+    copy_directory_contents(source, dest, link)
+
+
+def copy_directory_contents(src, dst, link=False):
+    # Returns the paths of every file published under dst
+    start = time.perf_counter()
+    jobs = [
+        (src_path, os.path.join(dst, rel_path))
+        for src_path, rel_path in walk_files(src)
+    ]
+    results = publish_assets(jobs, link)
+    published = [dst_path for dst_path, _ in results]
+    duplicates = link_duplicates(published) if link else 0
+    print_publish_summary(results, duplicates, time.perf_counter() - start)
+    return published
+
+
+def sync_static(
+    source="static", dest="docs", manifest=None, use_hash=False, link=False
+):
+    # Incremental alternative to copy_static: only changed assets are copied,
+    # and everything else in dest (generated pages included) is left alone.
+    # With link, identical assets are hardlinked together, including ones
+    # an earlier sync already published.
+    start = time.perf_counter()
+    if not os.path.exists(dest):
+        os.makedirs(dest)
+        print(f"Created directory: {dest}")
+
+    synced = set()
+    jobs = []
+    for src_path, rel_path in walk_files(source):
+        dst_path = os.path.join(dest, rel_path)
+        synced.add(rel_path)
+        jobs.append((src_path, dst_path))
+        if manifest is not None:
+            manifest.graph.record_asset(dst_path, src_path)
+
+    # Unchanged assets come back with no method
+    results = publish_assets(jobs, link, skip_unchanged=True, use_hash=use_hash)
+    published = [dst_path for dst_path, method in results if method is not None]
+
+    removed = 0
+    if manifest is not None:
+        for dst_path in published:
+            remove_siblings(dst_path, manifest.graph)
+        # Only assets a previous sync copied count as orphans
+        for rel_path in sorted(set(manifest.assets) - synced):
+            dst_path = os.path.join(dest, rel_path)
+            manifest.graph.remove_output(dst_path)
+            remove_siblings(dst_path, manifest.graph)
+            if remove_asset(dst_path, dest):
+                removed += 1
+        manifest.assets = sorted(synced)
+
+    print(
+        f"Synced static assets: {len(published)} copied, "
+        f"{len(results) - len(published)} unchanged, {removed} removed"
+    )
+    duplicates = link_duplicates([dst_path for dst_path, _ in results]) if link else 0
+    print_publish_summary(results, duplicates, time.perf_counter() - start)
+
+
+def publish_assets(
+    jobs, link=False, skip_unchanged=False, use_hash=False, threads=None
+):
+    # Publishes (source, destination) pairs on a pool of copy threads and
+    # returns (destination, method) pairs in the same order; the method is
+    # None for assets skipped as unchanged. Progress is reported at most
+    # once per PROGRESS_INTERVAL instead of once per file.
+    for dst_dir in sorted({os.path.dirname(dst_path) for _, dst_path in jobs}):
+        if dst_dir:
+            os.makedirs(dst_dir, exist_ok=True)
+
+    def publish(job):
+        src_path, dst_path = job
+        if skip_unchanged and asset_unchanged(src_path, dst_path, use_hash):
+            return dst_path, None
+        return dst_path, publish_file(src_path, dst_path, link)
+
+    results = []
+    last_report = time.perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=threads or COPY_THREADS, thread_name_prefix="ssg-copy"
+    ) as executor:
+        for result in executor.map(publish, jobs):
+            results.append(result)
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"Publishing static assets: {len(results)}/{len(jobs)}")
+                last_report = now
+    return results
+
+
+def copy_asset(src_path, dst_path, link=False):
+    # Returns how the file was published, see publish_file
+    dst_dir = os.path.dirname(dst_path)
+    if dst_dir and not os.path.exists(dst_dir):
+        os.makedirs(dst_dir)
+    print(f"Copying file: {src_path} -> {dst_path}")
+    return publish_file(src_path, dst_path, link)
+
+
+def print_publish_summary(results, duplicates=0, elapsed=0.0):
+    methods = Counter(method for _, method in results if method is not None)
+    if not methods:
+        return
+    counts = ", ".join(f"{count} by {name}" for name, count in sorted(methods.items()))
+    total = sum(methods.values())
+    summary = f"Published {total} asset(s) in {elapsed:.2f}s: {counts}"
+    if duplicates:
+        summary += f"; {duplicates} identical asset(s) hardlinked together"
+    print(summary)
+
+
+def remove_asset(dst_path, dest):
+    if not os.path.isfile(dst_path):
+        return False
+    print(f"Removing orphaned file: {dst_path}")
+    os.remove(dst_path)
+    remove_empty_dirs(os.path.dirname(dst_path), dest)
+    return True
+
+
+def walk_files(root):
+    # Yields (path, path relative to root) for every file under root
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            path = os.path.join(dir_path, file_name)
+            yield path, os.path.relpath(path, root)
+
+
+def asset_unchanged(src_path, dst_path, use_hash=False):
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_path)
+
+    if os.path.samestat(src_stat, dst_stat):
+        # A hardlink to the source is always up to date
+        return True
 
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if use_hash or dst_stat.st_nlink > 1:
+        # An output deduplicated onto another asset has that asset's mtime,
+        # so only its content says whether it is current
+        return hash_file(src_path) == hash_file(dst_path)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
 
-def copy_directory_contents(src, dst):
-    for filename in os.listdir(src):
-        src_path = os.path.join(src, filename)
-        dst_path = os.path.join(dst, filename)
 
-        if os.path.isfile(src_path):
-            print(f"Copying file: {src_path} -> {dst_path}")
-            shutil.copy(src_path, dst_path)
-        else:
-            print(f"Creating directory: {dst_path}")
-            os.mkdir(dst_path)
-            copy_directory_contents(src_path, dst_path)
+def remove_empty_dirs(path, root):
+    # Walk up from path, removing empty directories but never root itself
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
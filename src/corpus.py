@@ -0,0 +1,142 @@
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog elves rivendell ring shire "
+    "wizard river mountain road song fire star light shadow tower gate "
+    "forest king queen journey council sword lamp harbour wind"
+).split()
+
+
+def generate_markdown(size, rng, adversarial=False):
+    # Builds a document of roughly size characters out of random blocks
+    blocks = [f"# {sentence(rng, 3, 7).rstrip('.')}"]
+    length = len(blocks[0])
+    generators = ADVERSARIAL_BLOCKS if adversarial else REALISTIC_BLOCKS
+    while length < size:
+        block = rng.choice(generators)(rng)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def write_corpus(dest_dir, pages, page_size, seed=0, adversarial=False):
+    # Writes pages markdown files in a content-like tree and returns the paths
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        page_dir = os.path.join(dest_dir, "blog", f"post-{i:05d}")
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.md")
+        with open(path, "w") as f:
+            f.write(generate_markdown(page_size, rng, adversarial))
+        paths.append(path)
+    return paths
+
+
+def sentence(rng, low=6, high=18):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def inline_text(rng, low=2, high=5):
+    parts = []
+    for _ in range(rng.randint(low, high)):
+        text = sentence(rng)
+        word = rng.choice(WORDS)
+        kind = rng.random()
+        if kind < 0.15:
+            text += f" **{word}**"
+        elif kind < 0.3:
+            text += f" _{word}_"
+        elif kind < 0.4:
+            text += f" `{word}()`"
+        elif kind < 0.55:
+            text += f" [{word}](/blog/{word}/)"
+        elif kind < 0.6:
+            text += f" ![{word}](/images/{word}.png)"
+        parts.append(text)
+    return " ".join(parts)
+
+
+def paragraph(rng):
+    return "\n".join(inline_text(rng) for _ in range(rng.randint(1, 3)))
+
+
+def heading(rng):
+    return f"{'#' * rng.randint(2, 4)} {sentence(rng, 2, 6).rstrip('.')}"
+
+
+def unordered_list(rng):
+    items = [f"- {inline_text(rng, 1, 2)}" for _ in range(rng.randint(2, 8))]
+    return "\n".join(items)
+
+
+def ordered_list(rng):
+    count = rng.randint(2, 8)
+    items = [f"{i}. {inline_text(rng, 1, 2)}" for i in range(1, count + 1)]
+    return "\n".join(items)
+
+
+def quote(rng):
+    lines = [f"> {inline_text(rng, 1, 2)}" for _ in range(rng.randint(1, 4))]
+    return "\n".join(lines)
+
+
+def code(rng):
+    lines = [f"def {rng.choice(WORDS)}():"]
+    for _ in range(rng.randint(2, 10)):
+        lines.append(f"    {rng.choice(WORDS)} = {rng.randint(0, 999)}")
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def link_run(rng):
+    # Generated index pages: one long paragraph made of nothing but links
+    return " ".join(
+        f"[{rng.choice(WORDS)}](/blog/post-{rng.randint(0, 99999):05d}/)"
+        for _ in range(rng.randint(200, 2000))
+    )
+
+
+def unmatched_delimiters(rng):
+    markers = ["_", "**", "`", "[", "](", "!["]
+    words = rng.choices(WORDS, k=rng.randint(100, 1000))
+    return " ".join(f"{word}{rng.choice(markers)}" for word in words)
+
+
+def long_list(rng):
+    items = [f"- {sentence(rng, 2, 5)}" for _ in range(rng.randint(500, 3000))]
+    return "\n".join(items)
+
+
+def long_line(rng):
+    return " ".join(sentence(rng) for _ in range(rng.randint(200, 1000)))
+
+
+def sparse_code(rng):
+    # Fenced code full of blank lines and markdown-looking text
+    lines = []
+    for _ in range(rng.randint(50, 300)):
+        lines.append(f"**{rng.choice(WORDS)}** _x_ [a](b)")
+        lines.append("")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+REALISTIC_BLOCKS = (
+    paragraph,
+    paragraph,
+    paragraph,
+    heading,
+    unordered_list,
+    ordered_list,
+    quote,
+    code,
+)
+ADVERSARIAL_BLOCKS = (
+    link_run,
+    unmatched_delimiters,
+    long_list,
+    long_line,
+    sparse_code,
+    paragraph,
+)
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+
+DEPS_NAME = "deps.sqlite"
+
+# Kinds of edge from an output to something it was built from
+SOURCE = "source"
+TEMPLATE = "template"
+ASSET = "asset"
+COMPRESSED = "compressed"
+# A compressed sibling that was not written because it came out no smaller
+INCOMPRESSIBLE = "incompressible"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS edges (
+    output TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    input TEXT NOT NULL,
+    digest TEXT,
+    PRIMARY KEY (output, kind, input)
+);
+CREATE INDEX IF NOT EXISTS edges_by_input ON edges (input);
+"""
+
+
+class DependencyGraph:
+    # Records which inputs each output was built from: a page's markdown
+    # source and template, a static output's asset. Template edges keep the
+    # template digest they were built with, so a template edit invalidates
+    # exactly the pages that used it. Compressed siblings keep the digest of
+    # the output they were compressed from.
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        # Opened on first use, so a manifest that never records anything
+        # never creates the database
+        if self._connection is None:
+            dest_dir = os.path.dirname(self.path)
+            if dest_dir and not os.path.exists(dest_dir):
+                os.makedirs(dest_dir)
+            try:
+                self._connection = sqlite3.connect(self.path)
+                self._connection.executescript(SCHEMA)
+            except sqlite3.DatabaseError:
+                # A corrupt database just means every page is rebuilt
+                if self._connection is not None:
+                    self._connection.close()
+                os.remove(self.path)
+                self._connection = sqlite3.connect(self.path)
+                self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def record_page(self, output, source, template, template_digest):
+        self.set_inputs(
+            output, [(SOURCE, source, None), (TEMPLATE, template, template_digest)]
+        )
+
+    def record_asset(self, output, source):
+        self.set_inputs(output, [(ASSET, source, None)])
+
+    def record_compressed(self, output, source, source_digest, written=True):
+        kind = COMPRESSED if written else INCOMPRESSIBLE
+        self.set_inputs(output, [(kind, source, source_digest)])
+
+    def set_inputs(self, output, edges):
+        # Replaces everything output was previously built from
+        connection = self.connection
+        connection.execute("DELETE FROM edges WHERE output = ?", (output,))
+        connection.executemany(
+            "INSERT INTO edges (output, kind, input, digest) VALUES (?, ?, ?, ?)",
+            [(output, kind, path, digest) for kind, path, digest in edges],
+        )
+
+    def inputs(self, output, kind=None):
+        query = "SELECT input FROM edges WHERE output = ?"
+        params = [output]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        return sorted(row[0] for row in self.connection.execute(query, params))
+
+    def edges(self, kind):
+        # (output, input, digest) for every edge of kind
+        return self.connection.execute(
+            "SELECT output, input, digest FROM edges WHERE kind = ? ORDER BY output",
+            (kind,),
+        ).fetchall()
+
+    def dependents(self, paths, kind=None):
+        # Outputs built from any of paths
+        outputs = set()
+        for path in paths:
+            query = "SELECT output FROM edges WHERE input = ?"
+            params = [path]
+            if kind is not None:
+                query += " AND kind = ?"
+                params.append(kind)
+            outputs.update(row[0] for row in self.connection.execute(query, params))
+        return sorted(outputs)
+
+    def templates_current(self, output, fingerprint):
+        # True when output records a template and that template still has the
+        # digest output was built with; fingerprint maps path to digest
+        rows = self.connection.execute(
+            "SELECT input, digest FROM edges WHERE output = ? AND kind = ?",
+            (output, TEMPLATE),
+        ).fetchall()
+        if not rows:
+            return False
+        return all(fingerprint.get(path) == digest for path, digest in rows)
+
+    def remove_output(self, output):
+        self.connection.execute("DELETE FROM edges WHERE output = ?", (output,))
+
+    def save(self):
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
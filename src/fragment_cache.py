@@ -0,0 +1,264 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+FRAGMENT_DB = os.path.join(".ssg", "fragments.sqlite")
+# Bump whenever markdown_to_html renders a block differently, so fragments
+# cached by an older renderer are never served
+RENDERER_VERSION = 2
+# Enough for every distinct repeated block on a large site; fragments are
+# measured in characters, which is about bytes for HTML
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Larger fragments are rare enough that caching them only evicts many
+# smaller, more often repeated ones
+MAX_CACHED_FRAGMENT = 256 * 1024
+# Fragments no build has used for this long are pruned; a page that has not
+# been rebuilt in that time just reparses every block when it next changes
+FRAGMENT_MAX_AGE = 30 * 24 * 60 * 60
+# A fragment's last-used time is refreshed at most this often
+TOUCH_INTERVAL = 24 * 60 * 60
+# Fragments written, or marked used, per transaction
+FLUSH_EVERY = 1024
+
+FRAGMENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    version INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    html TEXT NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (version, type, digest)
+) WITHOUT ROWID;
+"""
+
+
+class FragmentCache:
+    # LRU of rendered block HTML bounded by total size, shared by every page
+    # in a build. A lock guards the order bookkeeping so threads can share
+    # one cache. With a store, misses fall through to fragments kept on disk.
+    def __init__(
+        self, max_bytes=DEFAULT_MAX_BYTES, max_fragment=MAX_CACHED_FRAGMENT, store=None
+    ):
+        self.max_bytes = max_bytes
+        self.max_fragment = max_fragment
+        self.store = store
+        self.fragments = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            html = self.fragments.get(key)
+            if html is not None:
+                self.fragments.move_to_end(key)
+                self.hits += 1
+                return html
+
+        html = self.store.get(key) if self.store is not None else None
+        with self.lock:
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.remember(key, html)
+            return html
+
+    def put(self, key, html):
+        with self.lock:
+            self.remember(key, html)
+        if self.store is not None:
+            self.store.put(key, html)
+
+    def remember(self, key, html):
+        # Callers hold the lock
+        if len(html) > self.max_fragment:
+            return
+        old = self.fragments.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.fragments[key] = html
+        self.size += len(html)
+        while self.size > self.max_bytes:
+            _, evicted = self.fragments.popitem(last=False)
+            self.size -= len(evicted)
+
+    def flush(self):
+        # Commits fragments the store is still holding back
+        if self.store is not None:
+            self.store.flush()
+
+    def clear(self):
+        with self.lock:
+            self.fragments.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.fragments)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
+class FragmentStore:
+    # Content-addressed fragments kept between builds in one sqlite table,
+    # keyed by renderer version, block type and digest, so bumping
+    # RENDERER_VERSION starts from an empty store. Writes are batched into
+    # one transaction per FLUSH_EVERY fragments. Every process opens its own
+    # connection; the lock lets threads share one.
+    def __init__(self, path=FRAGMENT_DB, version=RENDERER_VERSION):
+        self.path = path
+        self.version = version
+        self._connection = None
+        self._pending = []
+        self._touched = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Pickled into worker processes without the connection or batch
+        return {"path": self.path, "version": self.version}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["version"])
+
+    @property
+    def connection(self):
+        # Callers hold the lock
+        if self._connection is None:
+            dest_dir = os.path.dirname(self.path)
+            if dest_dir and not os.path.exists(dest_dir):
+                os.makedirs(dest_dir)
+            try:
+                self._connection = self.connect()
+            except sqlite3.DatabaseError:
+                # A corrupt store just means every block is rendered again
+                os.remove(self.path)
+                self._connection = self.connect()
+        return self._connection
+
+    def connect(self):
+        # Worker processes write at the same time; WAL lets them read while
+        # another commits, and the timeout waits out each other's commits
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(FRAGMENT_SCHEMA)
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def get(self, key):
+        block_type, digest = key
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT html, used FROM fragments"
+                " WHERE version = ? AND type = ? AND digest = ?",
+                (self.version, block_type, digest),
+            ).fetchone()
+            if row is None:
+                return None
+            html, used = row
+            # Records when a build last used the fragment, at most once a
+            # day, so warm builds do not rewrite every row they read
+            now = time.time()
+            if now - used > TOUCH_INTERVAL:
+                self._touched.append((now, self.version, block_type, digest))
+                self.flush_if_full()
+        return html
+
+    def put(self, key, html):
+        block_type, digest = key
+        with self._lock:
+            self._pending.append((self.version, block_type, digest, html, time.time()))
+            self.flush_if_full()
+
+    def flush_if_full(self):
+        # Callers hold the lock
+        if len(self._pending) + len(self._touched) >= FLUSH_EVERY:
+            self.commit()
+
+    def flush(self):
+        with self._lock:
+            self.commit()
+
+    def commit(self):
+        # Callers hold the lock
+        if not self._pending and not self._touched:
+            return
+        pending, touched = self._pending, self._touched
+        self._pending, self._touched = [], []
+        connection = self.connection
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO fragments"
+                    " (version, type, digest, html, used) VALUES (?, ?, ?, ?, ?)",
+                    pending,
+                )
+                connection.executemany(
+                    "UPDATE fragments SET used = ?"
+                    " WHERE version = ? AND type = ? AND digest = ?",
+                    touched,
+                )
+        except sqlite3.OperationalError:
+            # Still locked by another writer after the timeout; the blocks
+            # are just rendered again by a later build
+            pass
+
+    def prune(self, max_age=FRAGMENT_MAX_AGE):
+        # Deletes fragments of other renderer versions, which are never read
+        # again, and fragments unused for max_age seconds. Returns the number
+        # of fragments removed.
+        if not os.path.exists(self.path):
+            return 0
+        with self._lock:
+            self.commit()
+            with self.connection as connection:
+                cursor = connection.execute(
+                    "DELETE FROM fragments WHERE version != ? OR used < ?",
+                    (self.version, time.time() - max_age),
+                )
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.commit()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def fragment_key(lines, block_type, basepath="/"):
+    # Hash the source instead of keeping it, so keys stay small. Links are
+    # rendered with the basepath applied, so it is part of the key.
+    source = "\n".join((basepath, *lines)).encode()
+    return block_type.value, hashlib.blake2b(source, digest_size=16).digest()
+
+
+def prune_fragments(store):
+    removed = store.prune()
+    if removed:
+        print(f"Pruned {removed} unused fragment(s) from {store.path}")
+
+
+def format_stats(hits, misses):
+    lookups = hits + misses
+    rate = hits / lookups * 100 if lookups else 0.0
+    return f"Fragment cache: {hits} hits, {misses} misses ({rate:.1f}% hit rate)"
+
+
+# Process-wide cache used by markdown_to_html unless told otherwise
+FRAGMENT_CACHE = FragmentCache()
@@ -1,39 +1,173 @@
+import contextlib
+import mmap
 import os
-from markdown_to_html import markdown_to_html_node
-from extract_title import extract_title
+from collections import namedtuple
+from markdown_to_html import markdown_to_document
+from template import TemplateRegistry, extract_layout, extract_layout_lines
 
+# Sources at least this large are memory-mapped and parsed a line at a time
+# rather than read into one string
+MMAP_THRESHOLD = 4 * 1024 * 1024
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
+# What happened to one page: the template used (None on failure), the error
+# message if it failed, its profile, (fragment cache hits, misses) and
+# whether the output file was written or left alone because it was unchanged
+PageResult = namedtuple(
+    "PageResult", ["template", "error", "profile", "cache_stats", "written"]
+)
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath="/",
+    templates=None,
+    profile=None,
+    if_changed=False,
+):
+    if templates is None:
+        templates = TemplateRegistry(template_path, basepath)
+    used_template, _ = build_page(
+        from_path, dest_path, templates, basepath, profile, if_changed
+    )
+    return used_template
+
+
+def build_page(
+    from_path, dest_path, templates, basepath="/", profile=None, if_changed=False
+):
+    # Returns the template used and whether the output was written
     # Read the markdown file
+    markdown = read_page(from_path)
+    if profile is not None:
+        profile.mark("read")
+
+    template, values = parse_page(markdown, templates, basepath)
+
+    if profile is None and not if_changed:
+        # Fill placeholders, streaming the content straight to the destination
+        stream_page(dest_path, template, values)
+        return template.path, True
+
+    # Rendering and writing are interleaved when streaming; render into
+    # memory first so the two can be timed separately, or so the output can
+    # be compared with what is already on disk
+    if profile is not None:
+        profile.mark("parse")
+    html = template.render(values)
+    if profile is not None:
+        profile.mark("render")
+    written = write_page(dest_path, html, if_changed)
+    if profile is not None:
+        profile.mark("write")
+        profile.bytes_in = os.path.getsize(from_path)
+        profile.bytes_out = os.path.getsize(dest_path)
+    return template.path, written
+
+
+def read_page(from_path):
+    # Returns the markdown as a string, or for large sources a lazy iterator
+    # of its lines, so the parser never holds the whole file and its copies
+    if os.path.getsize(from_path) >= MMAP_THRESHOLD:
+        return mapped_lines(from_path)
     with open(from_path, "r") as f:
-        markdown = f.read()
+        return f.read()
+
+
+def mapped_lines(path):
+    # Finds line ends in a read-only map of the file and decodes one line at
+    # a time as the block scanner asks for it. Pages already scanned stay in
+    # the page cache rather than in the process, so memory follows the
+    # largest block instead of the size of the file.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            pos = 0
+            while pos < size:
+                end = mapped.find(b"\n", pos)
+                if end == -1:
+                    end = size
+                yield mapped[pos:end].decode()
+                pos = end + 1
+
+
+def parse_page(markdown, templates, basepath="/"):
+    # Returns the page's compiled template and the values for its slots
+
+    # Look up the compiled template, honouring a per-page layout
+    if isinstance(markdown, str):
+        layout, markdown = extract_layout(markdown)
+    else:
+        layout, markdown = extract_layout_lines(markdown)
+    template = templates.get(layout)
+
+    # Convert markdown to HTML and find the title in the same pass, with the
+    # basepath applied to links and images
+    document = markdown_to_document(markdown, basepath=basepath)
+    if document.title is None:
+        raise ValueError("No h1 header found in markdown")
+
+    return template, {"Title": document.title, "Content": document.html}
+
+
+def stream_page(dest_path, template, values):
+    # Writes the page without ever holding its HTML as one string
+    with open_output(dest_path) as f:
+        template.write(f, values)
+
+
+def write_page(dest_path, html, if_changed=False):
+    # Returns False when if_changed is set and the file already holds html,
+    # in which case it is left untouched and keeps its mtime
+    if not if_changed:
+        with open_output(dest_path) as f:
+            f.write(html)
+        return True
 
-    # Read the template file
-    with open(template_path, "r") as f:
-        template = f.read()
+    data = html.encode()
+    if output_matches(dest_path, data):
+        return False
+    with open_output(dest_path, "wb") as f:
+        f.write(data)
+    return True
 
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown)
-    html_content = html_node.to_html()
 
-    # Extract the title
-    title = extract_title(markdown)
+@contextlib.contextmanager
+def open_output(dest_path, mode="w"):
+    # Writes to a temporary file renamed over dest_path when done. Readers
+    # never see half a page, and an existing output that is a hardlink (into
+    # static/, with --link-assets) is replaced rather than written through.
+    make_parent_dir(dest_path)
+    tmp_path = f"{dest_path}.ssg-tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
 
-    # Replace placeholders
-    html = template.replace("{{ Title }}", title)
-    html = html.replace("{{ Content }}", html_content)
 
-    # Replace basepath in href and src attributes
-    html = html.replace('href="/', f'href="{basepath}')
-    html = html.replace('src="/', f'src="{basepath}')
+def output_matches(dest_path, data):
+    # Sizes first, so most changed pages are caught by a stat call; equal
+    # sizes are settled by comparing contents, which is what comparing
+    # hashes would do minus the hashing
+    try:
+        if os.path.getsize(dest_path) != len(data):
+            return False
+        with open(dest_path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
 
-    # Create directories if needed
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
 
-    # Write to destination file
-    with open(dest_path, "w") as f:
-        f.write(html)
+def make_parent_dir(path):
+    # Create directories if needed; safe when writers race to create them
+    dest_dir = os.path.dirname(path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
@@ -1,11 +1,116 @@
+import multiprocessing.util
 import os
-from generate_page import generate_page
+from concurrent.futures import ProcessPoolExecutor
+from fragment_cache import FRAGMENT_CACHE, format_stats
+from generate_page import PageResult, build_page
+from pipeline import describe_error, run_pipeline
+from profiler import PageProfile
+from publish import remove_siblings
+from template import TemplateRegistry
+
+# Compiled templates shared by every page a worker process renders
+_worker_templates = None
 
 
 def generate_pages_recursive(
-    dir_path_content, template_path, dest_dir_path, basepath="/"
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath="/",
+    manifest=None,
+    jobs=1,
+    templates=None,
+    profile=None,
+    if_changed=False,
+):
+    if templates is None:
+        templates = TemplateRegistry(template_path, basepath).load_all()
+
+    pages = collect_pages(dir_path_content, dest_dir_path)
+
+    if manifest is not None:
+        pending = []
+        for from_path, dest_path in pages:
+            if manifest.is_fresh(from_path, dest_path, templates):
+                print(f"Skipping unchanged page: {from_path}")
+            else:
+                pending.append((from_path, dest_path))
+        pages = pending
+
+    generate_pages(pages, templates, basepath, manifest, jobs, profile, if_changed)
+
+
+def generate_pages(
+    pages,
+    templates,
+    basepath="/",
+    manifest=None,
+    jobs=1,
+    profile=None,
+    if_changed=False,
 ):
-    for entry in os.listdir(dir_path_content):
+    # Generates an explicit list of (source, output) pairs, e.g. just the
+    # pages a watcher saw change. With if_changed, outputs that would come
+    # out byte-identical are left alone so their mtimes do not change.
+    errors = []
+    hits = misses = 0
+    written = skipped = 0
+    fingerprint = templates.fingerprint()
+    for (from_path, dest_path), result in run_page_jobs(
+        pages, templates, basepath, jobs, profile is not None, if_changed
+    ):
+        hits += result.cache_stats[0]
+        misses += result.cache_stats[1]
+        if result.error is not None:
+            errors.append((from_path, result.error))
+            continue
+        if profile is not None:
+            profile.add(result.profile)
+
+        if result.written:
+            written += 1
+            print(
+                f"Generating page from {from_path} to {dest_path} "
+                f"using {result.template}"
+            )
+        else:
+            skipped += 1
+            print(f"Unchanged output, not rewritten: {dest_path}")
+        if manifest is not None:
+            if result.written:
+                remove_siblings(dest_path, manifest.graph)
+            manifest.record(from_path, dest_path)
+            digest = fingerprint.get(result.template)
+            manifest.graph.record_page(dest_path, from_path, result.template, digest)
+    FRAGMENT_CACHE.flush()
+
+    if hits or misses:
+        print(format_stats(hits, misses))
+    if if_changed and (written or skipped):
+        print(f"Pages written: {written}, unchanged and skipped: {skipped}")
+
+    if errors:
+        for from_path, error in errors:
+            print(f"Failed to generate page {from_path}: {error}")
+        raise RuntimeError(f"{len(errors)} page(s) failed to generate")
+
+
+def build_config(basepath="/"):
+    # Settings that affect every page; a change invalidates the whole manifest.
+    # Templates are tracked per page in the dependency graph instead.
+    return {"basepath": basepath}
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    rel_path = os.path.relpath(from_path, dir_path_content)
+    dest_path = os.path.join(dest_dir_path, rel_path)
+    return dest_path.replace(".md", ".html")
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    # Sorted so the work list, and therefore the log, is the same every run
+    pages = []
+    for entry in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, entry)
         dest_path = os.path.join(dest_dir_path, entry)
 
@@ -14,7 +119,75 @@ def generate_pages_recursive(
                 # It's a markdown file, generate HTML
                 # Replace .md extension with .html
                 dest_path = dest_path.replace(".md", ".html")
-                generate_page(from_path, template_path, dest_path, basepath)
+                pages.append((from_path, dest_path))
         else:
             # It's a directory, recurse
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
+
+
+def run_page_jobs(
+    pages, templates, basepath="/", jobs=1, profile=False, if_changed=False
+):
+    # Yields (page, PageResult) pairs in the same order as pages
+    if jobs == 1 or len(pages) <= 1:
+        # One process: overlap disk reads and writes with rendering instead
+        yield from run_pipeline(pages, templates, basepath, profile, if_changed)
+        return
+
+    store = FRAGMENT_CACHE.store
+
+    # The registry is pickled once per worker instead of once per page
+    jobs_args = [
+        (from_path, dest_path, basepath, profile, if_changed)
+        for from_path, dest_path in pages
+    ]
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(templates, store)
+    ) as executor:
+        results = executor.map(_generate_page_job, jobs_args, chunksize=chunksize)
+        yield from zip(pages, results)
+
+
+def _init_worker(templates, store=None):
+    global _worker_templates
+    _worker_templates = templates
+    # Workers share the on-disk fragment store, if the build uses one, and
+    # commit what they still hold back when the pool shuts them down
+    FRAGMENT_CACHE.store = store
+    if store is not None:
+        multiprocessing.util.Finalize(store, store.close, exitpriority=0)
+
+
+def _generate_page_job(args):
+    # Runs inside a worker, so report failures as text instead of raising.
+    # Each worker has its own fragment cache; report this page's share of it.
+    from_path, dest_path, basepath, profile, if_changed = args
+    page_profile = PageProfile(from_path) if profile else None
+    hits, misses = FRAGMENT_CACHE.hits, FRAGMENT_CACHE.misses
+    try:
+        used_template, written = build_page(
+            from_path,
+            dest_path,
+            _worker_templates,
+            basepath,
+            page_profile,
+            if_changed,
+        )
+    except Exception as e:
+        used_template, written = None, False
+        error, page_profile = describe_error(e), None
+    else:
+        error = None
+    cache_stats = (FRAGMENT_CACHE.hits - hits, FRAGMENT_CACHE.misses - misses)
+    return PageResult(used_template, error, page_profile, cache_stats, written)
+
+
+def remove_stale_pages(manifest):
+    # Delete outputs whose markdown source has been removed
+    for entry in manifest.remove_missing().values():
+        if os.path.exists(entry["output"]):
+            print(f"Removing stale page: {entry['output']}")
+            os.remove(entry["output"])
+        remove_siblings(entry["output"], manifest.graph)
@@ -1,4 +1,26 @@
+SELF_CLOSING_TAGS = frozenset(
+    {
+        "img",
+        "br",
+        "hr",
+        "input",
+        "meta",
+        "link",
+        "area",
+        "base",
+        "col",
+        "embed",
+        "source",
+        "track",
+        "wbr",
+    }
+)
+
+
 class HTMLNode:
+    # Pages create a node per tag and text run; slots keep each one small
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,6 +30,13 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self):
+        # Yields the rendered HTML in chunks
+        yield self.to_html()
+
+    def write_html(self, fp):
+        fp.write(self.to_html())
+
     def props_to_html(self):
         if self.props is None or len(self.props) == 0:
             return ""
@@ -23,6 +52,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
@@ -33,40 +64,55 @@ class LeafNode(HTMLNode):
         if self.tag is None:
             return self.value
 
-        self_closing_tags = {
-            "img",
-            "br",
-            "hr",
-            "input",
-            "meta",
-            "link",
-            "area",
-            "base",
-            "col",
-            "embed",
-            "source",
-            "track",
-            "wbr",
-        }
-
-        if self.tag in self_closing_tags:
+        if self.tag in SELF_CLOSING_TAGS:
             return f"<{self.tag}{self.props_to_html()}>"
 
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def write_html(self, fp):
+        # Streams straight to the file without building the page in memory
+        self.render(fp.write)
+
+    def render(self, emit):
+        # emit is called with each chunk of HTML in document order
+        for chunk in self.iter_html():
+            emit(chunk)
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack instead of recursing, so
+        # nesting depth is bounded by memory rather than the recursion limit.
+        # Chunks are produced as the walk reaches them, never all at once.
+        self.check()
+        yield f"<{self.tag}{self.props_to_html()}>"
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    child.check()
+                    if child.props:
+                        yield f"<{child.tag}{child.props_to_html()}>"
+                    else:
+                        yield f"<{child.tag}>"
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                yield child.to_html()
+            else:
+                stack.pop()
+                yield f"</{tag}>"
+
+    def check(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         if self.children is None:
             raise ValueError("ParentNode must have children")
-
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
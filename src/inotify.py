@@ -0,0 +1,122 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+
+# Events from inotify(7). File writes are reported when the writer closes
+# the file, so a half-written save never triggers a rebuild.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+# struct inotify_event, followed by len bytes of NUL-padded name
+EVENT = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+def load_libc():
+    # None wherever inotify is unavailable, so callers fall back to polling
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class Inotify:
+    # A thin wrapper around an inotify descriptor. Watches are per directory
+    # and not recursive; callers add one for every directory they care about.
+    def __init__(self, libc):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise_errno()
+        # Watch descriptor -> directory it watches
+        self.directories = {}
+
+    @classmethod
+    def open(cls):
+        # Returns None when this platform or process cannot use inotify
+        libc = load_libc()
+        if libc is None:
+            return None
+        try:
+            return cls(libc)
+        except OSError:
+            return None
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR
+        )
+        if wd < 0:
+            raise_errno(directory)
+        self.directories[wd] = directory
+        return wd
+
+    def read(self, timeout=None):
+        # Waits up to timeout seconds for events and returns them as
+        # (directory, name, mask) tuples; the directory is None for events
+        # about the queue itself, such as IN_Q_OVERFLOW
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_IGNORED:
+                # The directory was removed, or moved out of sight
+                self.directories.pop(wd, None)
+                continue
+            events.append((self.directories.get(wd), name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def raise_errno(path=None):
+    code = ctypes.get_errno() or errno.EINVAL
+    raise OSError(code, os.strerror(code), path)
@@ -0,0 +1,102 @@
+import os
+import threading
+from server import StaticHandler, make_server
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = (
+    b"<script>"
+    b'new EventSource("' + RELOAD_PATH.encode() + b'").onmessage = '
+    b"() => location.reload();"
+    b"</script>"
+)
+
+
+class ReloadBroadcaster:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        # Blocks until a reload newer than version happens or timeout passes
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class LiveReloadHandler(StaticHandler):
+    # Pages get the reload client injected and are never cached; everything
+    # else is served like `main.py serve` does
+    reloader = None
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+
+        super().do_GET()
+
+    def send_html(self, path):
+        # Inject the reload client on the fly; files on disk stay untouched
+        with open(path, "rb") as f:
+            body = f.read()
+        index = body.rfind(b"</body>")
+        if index == -1:
+            body += RELOAD_SCRIPT
+        else:
+            body = body[:index] + RELOAD_SCRIPT + body[index:]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_reload_events(self):
+        # The stream has no length, so it ends with the connection
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        version = self.reloader.version
+        try:
+            while True:
+                latest = self.reloader.wait(version, timeout=15)
+                if latest == version:
+                    # Keep-alive comment, which also notices closed tabs
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = latest
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # Request logs would drown out the rebuild output
+        pass
+
+
+def start_server(directory, port=8888, host="", basepath="/"):
+    # Pages built for a basepath link to it, so it is served from there
+    reloader = ReloadBroadcaster()
+    server = make_server(directory, port, host, LiveReloadHandler, basepath)
+    server.RequestHandlerClass.reloader = reloader
+    server.reloader = reloader
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -1,16 +1,180 @@
+import argparse
+import os
 import sys
-from copy_static import copy_static
-from generate_pages import generate_pages_recursive
+from compress import compress_outputs
+from copy_static import copy_static, sync_static
+from fragment_cache import FRAGMENT_CACHE, FragmentStore, prune_fragments
+from generate_pages import build_config, generate_pages_recursive, remove_stale_pages
+from manifest import BuildManifest
+from profiler import PROFILE_PATH, BuildProfile
+from server import serve
+from template import TemplateRegistry
+from watch import watch
 
+COMMANDS = {
+    "build": "Build the static site",
+    "watch": "Build, serve and rebuild the site whenever a source file changes",
+    "serve": "Serve the built site without rebuilding it",
+}
 
-def main():
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Building is the default, so `main.py /ssg/` keeps working
+    command = "build"
+    if argv and argv[0] in COMMANDS:
+        command, argv = argv[0], argv[1:]
+
+    parser = argparse.ArgumentParser(
+        prog=f"main.py {command}", description=COMMANDS[command]
+    )
     # Get basepath from CLI argument, default to /
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for page generation (0 uses every CPU)",
+    )
+    if command == "build":
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="only regenerate pages whose source changed since the last build",
+        )
+        parser.add_argument(
+            "--checksum",
+            action="store_true",
+            help="with --incremental, compare static assets by content hash "
+            "instead of size and mtime",
+        )
+        parser.add_argument(
+            "--link-assets",
+            action="store_true",
+            help="hardlink static assets into the output instead of copying "
+            "them, and hardlink identical assets to each other",
+        )
+        parser.add_argument(
+            "--write-if-changed",
+            action="store_true",
+            help="with --incremental, leave pages whose rendered HTML is "
+            "unchanged untouched so their mtimes survive",
+        )
+        parser.add_argument(
+            "--compress",
+            action="store_true",
+            help="write .gz siblings (and .zst when zstd is available) next to "
+            "compressible outputs; with --incremental, unchanged outputs are "
+            "skipped",
+        )
+        parser.add_argument(
+            "--profile",
+            nargs="?",
+            const=PROFILE_PATH,
+            metavar="PATH",
+            help="time every page stage and write a JSON report "
+            f"(default {PROFILE_PATH})",
+        )
+        parser.add_argument(
+            "--slowest",
+            type=int,
+            default=10,
+            help="number of slowest pages to print with --profile",
+        )
+    else:
+        parser.add_argument("--port", type=int, default=8888)
+    if command == "watch":
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.05,
+            help="seconds between polls for changed files, where inotify is unavailable",
+        )
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if command == "watch":
+        watch(args.basepath, args.port, args.interval, jobs)
+    elif command == "serve":
+        serve("docs", args.port, args.basepath)
+    else:
+        build(
+            args.basepath,
+            args.incremental,
+            args.checksum,
+            jobs,
+            args.profile,
+            args.slowest,
+            args.write_if_changed,
+            args.link_assets,
+            args.compress,
+        )
+
+
+def build(
+    basepath="/",
+    incremental=False,
+    checksum=False,
+    jobs=1,
+    profile_path=None,
+    slowest=10,
+    write_if_changed=False,
+    link_assets=False,
+    compress=False,
+):
+    templates = TemplateRegistry("template.html", basepath).load_all()
+
+    manifest = None
+    if incremental:
+        manifest = BuildManifest.load()
+        manifest.set_config(build_config(basepath))
+        # Keep rendered blocks between runs so an edited page only reparses
+        # the blocks that changed
+        FRAGMENT_CACHE.store = FragmentStore()
+
+    profile = BuildProfile() if profile_path else None
+
+    try:
+        if incremental:
+            sync_static(manifest=manifest, use_hash=checksum, link=link_assets)
+        else:
+            copy_static(link_assets)
+        generate_pages_recursive(
+            "content",
+            templates.default_path,
+            "docs",
+            basepath,
+            manifest,
+            jobs,
+            templates,
+            profile,
+            # A full build starts from an empty output directory, so there is
+            # nothing to compare against
+            incremental and write_if_changed,
+        )
+
+        if profile is not None:
+            profile.save(profile_path)
+            profile.print_summary(slowest)
+            print(f"Wrote profile to {profile_path}")
+
+        if manifest is not None:
+            remove_stale_pages(manifest)
+        if compress:
+            # After stale pages are gone, so their siblings are swept too
+            compress_outputs("docs", manifest.graph if manifest is not None else None)
+    finally:
+        # Pages that built are recorded even when others failed, so the next
+        # incremental build only retries the failures
+        if manifest is not None:
+            manifest.save()
 
-    copy_static()
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    if manifest is not None:
+        prune_fragments(FRAGMENT_CACHE.store)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from depgraph import DEPS_NAME, DependencyGraph
+
+MANIFEST_PATH = os.path.join(".ssg", "manifest.json")
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.config = {}
+        self.pages = {}
+        # Static assets copied by the last sync, relative to the output dir
+        self.assets = []
+        # What each output was built from, kept next to the manifest
+        self.graph = DependencyGraph(os.path.join(os.path.dirname(path), DEPS_NAME))
+
+    @classmethod
+    def load(cls, path=MANIFEST_PATH):
+        manifest = cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A missing or corrupt manifest just means a full build
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+
+        manifest.config = data.get("config", {})
+        manifest.pages = data.get("pages", {})
+        manifest.assets = data.get("assets", [])
+        return manifest
+
+    def save(self):
+        dest_dir = os.path.dirname(self.path)
+        if dest_dir and not os.path.exists(dest_dir):
+            os.makedirs(dest_dir)
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "config": self.config,
+            "pages": self.pages,
+            "assets": self.assets,
+        }
+
+        # Write to a temporary file first so an interrupted build never
+        # leaves a half-written manifest behind
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.graph.save()
+
+    def set_config(self, config):
+        # Anything that affects every page (the basepath) invalidates all
+        # recorded pages when it changes
+        if config != self.config:
+            self.pages = {}
+            self.config = config
+
+    def is_fresh(self, from_path, dest_path, templates=None):
+        # With a template registry, the page must also have been built with
+        # the current version of the template it used
+        entry = self.pages.get(from_path)
+        if entry is None or entry["output"] != dest_path:
+            return False
+        try:
+            output = os.stat(dest_path)
+        except FileNotFoundError:
+            return False
+        if (output.st_size, output.st_mtime_ns) != (
+            entry.get("output_size"),
+            entry.get("output_mtime"),
+        ):
+            # Rewritten by something other than the build that recorded it,
+            # e.g. a full build that replaced docs/
+            return False
+        if templates is not None and not self.graph.templates_current(
+            dest_path, templates.fingerprint()
+        ):
+            return False
+
+        stat = os.stat(from_path)
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime"]:
+            return True
+        if stat.st_size != entry["size"]:
+            return False
+
+        # Same size but touched: fall back to comparing content hashes
+        if hash_file(from_path) != entry["hash"]:
+            return False
+
+        entry["mtime"] = stat.st_mtime_ns
+        return True
+
+    def record(self, from_path, dest_path):
+        stat = os.stat(from_path)
+        output = os.stat(dest_path)
+        self.pages[from_path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": hash_file(from_path),
+            "output": dest_path,
+            "output_size": output.st_size,
+            "output_mtime": output.st_mtime_ns,
+        }
+
+    def remove_missing(self):
+        # Drop pages whose source no longer exists and return their entries
+        removed = {}
+        for from_path in list(self.pages):
+            if not os.path.exists(from_path):
+                removed[from_path] = self.pages.pop(from_path)
+                self.graph.remove_output(removed[from_path]["output"])
+        return removed
@@ -1,8 +1,69 @@
+from block_types import BlockType, block_type_from_lines
+
+
+class Block:
+    def __init__(self, block_type, lines, start, end):
+        self.block_type = block_type
+        self.lines = lines
+        # 1-based line numbers of the first and last line in the source
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, lines {self.start}-{self.end})"
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        stripped = block.strip()
-        if stripped:
-            filtered_blocks.append(stripped)
-    return filtered_blocks
+    return [block.text for block in scan_blocks(markdown.split("\n"))]
+
+
+def scan_blocks(lines):
+    # Reads lines from any iterable (a list, an open file) and yields typed
+    # blocks as soon as each one ends, so only one block is held at a time
+    block_lines = []
+    start = 0
+    in_fence = False
+
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+
+        if in_fence:
+            # Blank lines inside fenced code belong to the code block
+            block_lines.append(line)
+            if line.rstrip().endswith("```"):
+                in_fence = False
+            continue
+
+        if not line.strip():
+            if block_lines:
+                yield make_block(block_lines, start)
+                block_lines = []
+            continue
+
+        if not block_lines:
+            start = number
+            line = line.lstrip()
+            fence = line.rstrip()
+            if fence.startswith("```") and not (
+                len(fence) >= 6 and fence.endswith("```")
+            ):
+                in_fence = True
+        block_lines.append(line)
+
+    if block_lines:
+        # An unclosed fence is code to the end of the input, as in CommonMark
+        yield make_block(block_lines, start, BlockType.CODE if in_fence else None)
+
+
+def make_block(lines, start, block_type=None):
+    # Trailing blank lines only survive in an unclosed fence
+    while not lines[-1].strip():
+        lines.pop()
+    lines[-1] = lines[-1].rstrip()
+    if block_type is None:
+        block_type = block_type_from_lines(lines)
+    return Block(block_type, lines, start, start + len(lines) - 1)
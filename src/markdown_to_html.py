@@ -1,65 +1,119 @@
-from markdown_blocks import markdown_to_blocks
-from block_types import block_to_block_type, BlockType
+from markdown_blocks import scan_blocks
+from block_types import BlockType
 from split_nodes import text_to_textnodes
 from textnode import TextNode, TextType, text_node_to_html_node
-from htmlnode import ParentNode
+from htmlnode import LeafNode, ParentNode
+from fragment_cache import FRAGMENT_CACHE, fragment_key
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+class Document:
+    def __init__(self, title, outline, html):
+        # Text of the first h1, or None when the page has none
+        self.title = title
+        # (level, text, line number) for every heading, in document order
+        self.outline = outline
+        self.html = html
+
+    def __repr__(self):
+        return f"Document({self.title!r}, {len(self.outline)} headings)"
+
+
+def markdown_to_document(markdown, cache=FRAGMENT_CACHE, basepath="/"):
+    # Accepts a markdown string or any iterable of lines, e.g. an open file
+    if isinstance(markdown, str):
+        markdown = markdown.split("\n")
+    return blocks_to_document(scan_blocks(markdown), cache, basepath)
+
+
+def markdown_to_html_node(markdown, cache=FRAGMENT_CACHE, basepath="/"):
+    return markdown_to_document(markdown, cache, basepath).html
+
+
+def blocks_to_html_node(blocks, cache=FRAGMENT_CACHE, basepath="/"):
+    return blocks_to_document(blocks, cache, basepath).html
+
+
+def blocks_to_document(blocks, cache=FRAGMENT_CACHE, basepath="/"):
+    # One pass over the blocks builds the tree and collects the headings
+    title = None
+    outline = []
     children = []
 
     for block in blocks:
-        block_type = block_to_block_type(block)
-        html_node = block_to_html_node(block, block_type)
+        if block.block_type == BlockType.HEADING:
+            first_line = block.lines[0]
+            level = heading_level(first_line)
+            text = first_line[level + 1 :].strip()
+            outline.append((level, text, block.start))
+            if level == 1 and title is None:
+                title = text
+
+        html_node = block_to_html_node(block.lines, block.block_type, cache, basepath)
         children.append(html_node)
 
-    return ParentNode("div", children)
+    return Document(title, outline, ParentNode("div", children))
+
+
+def block_to_html_node(lines, block_type, cache=FRAGMENT_CACHE, basepath="/"):
+    # Repeated blocks (bios, disclaimers, nav lists) are rendered once and
+    # returned as a raw HTML leaf after that; pass cache=None to get the tree
+    if cache is None:
+        return render_block(lines, block_type, basepath)
+
+    key = fragment_key(lines, block_type, basepath)
+    html = cache.get(key)
+    if html is None:
+        html = render_block(lines, block_type, basepath).to_html()
+        cache.put(key, html)
+    return LeafNode(None, html)
 
 
-def block_to_html_node(block, block_type):
+def render_block(lines, block_type, basepath="/"):
+    # basepath is applied as link and image URLs are emitted; code blocks
+    # never see it, so their contents are left exactly as written
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(lines, basepath)
     elif block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(lines, basepath)
     elif block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return code_to_html_node(lines)
     elif block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(lines, basepath)
     elif block_type == BlockType.UNORDERED_LIST:
-        return unordered_list_to_html_node(block)
+        return unordered_list_to_html_node(lines, basepath)
     elif block_type == BlockType.ORDERED_LIST:
-        return ordered_list_to_html_node(block)
+        return ordered_list_to_html_node(lines, basepath)
 
 
-def text_to_children(text):
+def text_to_children(text, basepath="/"):
     text_nodes = text_to_textnodes(text)
-    html_nodes = [text_node_to_html_node(node) for node in text_nodes]
+    html_nodes = [text_node_to_html_node(node, basepath) for node in text_nodes]
     return html_nodes
 
 
-def paragraph_to_html_node(block):
-    children = text_to_children(block)
+def paragraph_to_html_node(lines, basepath="/"):
+    children = text_to_children("\n".join(lines), basepath)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
-    heading_level = 0
-    for char in block:
-        if char == "#":
-            heading_level += 1
-        else:
-            break
+def heading_level(line):
+    return len(line) - len(line.lstrip("#"))
 
-    text = block[heading_level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{heading_level}", children)
 
+def heading_to_html_node(lines, basepath="/"):
+    level = heading_level(lines[0])
+    text = "\n".join(lines)[level + 1 :]
+    children = text_to_children(text, basepath)
+    return ParentNode(f"h{level}", children)
 
-def code_to_html_node(block):
-    text = block[3:-3]
 
-    lines = text.split("\n")
+def code_to_html_node(lines):
+    # Drop the opening and closing fences; a fence left open at the end of
+    # the input has no closing one
+    lines = list(lines)
+    lines[0] = lines[0][3:]
+    if lines[-1].endswith("```"):
+        lines[-1] = lines[-1][:-3]
 
     if lines and lines[0].strip() and not lines[0].startswith(" "):
         lines = lines[1:]
@@ -71,8 +125,7 @@ def code_to_html_node(block):
     return ParentNode("pre", [html_node])
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(lines, basepath="/"):
     quote_lines = []
 
     for line in lines:
@@ -82,31 +135,29 @@ def quote_to_html_node(block):
             quote_lines.append(line[1:])
 
     quote_text = "\n".join(quote_lines)
-    children = text_to_children(quote_text)
+    children = text_to_children(quote_text, basepath)
     return ParentNode("blockquote", children)
 
 
-def unordered_list_to_html_node(block):
-    lines = block.split("\n")
+def unordered_list_to_html_node(lines, basepath="/"):
     list_items = []
 
     for line in lines:
         item_text = line[2:]
-        children = text_to_children(item_text)
+        children = text_to_children(item_text, basepath)
         list_item = ParentNode("li", children)
         list_items.append(list_item)
 
     return ParentNode("ul", list_items)
 
 
-def ordered_list_to_html_node(block):
-    lines = block.split("\n")
+def ordered_list_to_html_node(lines, basepath="/"):
     list_items = []
 
     for line in lines:
         dot_index = line.index(". ")
         item_text = line[dot_index + 2 :]
-        children = text_to_children(item_text)
+        children = text_to_children(item_text, basepath)
         list_item = ParentNode("li", children)
         list_items.append(list_item)
 
@@ -0,0 +1,160 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fragment_cache import FRAGMENT_CACHE
+from generate_page import PageResult, parse_page, read_page, stream_page, write_page
+from profiler import PageProfile
+
+# Pages read ahead of the renderer
+READ_AHEAD = 8
+# Writer threads, and rendered pages allowed to wait for one. Slow or
+# network filesystems spend most of a write waiting, so several run at once.
+WRITE_THREADS = 4
+WRITE_BACKLOG = 16
+
+
+def run_pipeline(
+    pages,
+    templates,
+    basepath="/",
+    profile=False,
+    if_changed=False,
+    read_ahead=READ_AHEAD,
+    write_threads=WRITE_THREADS,
+    write_backlog=WRITE_BACKLOG,
+):
+    # Overlaps reading, rendering and writing: a reader thread prefetches
+    # sources, this thread parses, and a thread pool writes. Both hand-offs
+    # are bounded, so a slow disk holds the parser back instead of letting
+    # parsed pages pile up in memory.
+    # Pages are streamed to disk by the writers unless they must be rendered
+    # into memory first, to time the render or compare with the output on
+    # disk. Large sources, which read_page maps instead of reading, are
+    # finished here one at a time rather than queued.
+    # Yields (page, PageResult) pairs in the same order as pages.
+    sources = queue.Queue(maxsize=read_ahead)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=read_pages, args=(pages, sources, stop, profile), daemon=True
+    )
+    reader.start()
+
+    slots = threading.BoundedSemaphore(write_backlog)
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(
+            max_workers=write_threads, thread_name_prefix="ssg-writer"
+        ) as writers:
+            for page, markdown, error, page_profile in iter(sources.get, None):
+                hits, misses = FRAGMENT_CACHE.hits, FRAGMENT_CACHE.misses
+                used_template, output, written = None, None, False
+                large = not isinstance(markdown, str)
+                if error is None:
+                    if page_profile is not None:
+                        page_profile.restart()
+                    try:
+                        template, values = parse_page(markdown, templates, basepath)
+                        if page_profile is not None:
+                            page_profile.mark("parse")
+                        if page_profile is not None or if_changed:
+                            output = template.render(values)
+                            if page_profile is not None:
+                                page_profile.mark("render")
+                        else:
+                            output = (template, values)
+                        if large:
+                            written = write_job(
+                                page, output, page_profile, None, if_changed
+                            )
+                            output = None
+                        used_template = template.path
+                    except Exception as e:
+                        error = describe_error(e)
+                cache_stats = (
+                    FRAGMENT_CACHE.hits - hits,
+                    FRAGMENT_CACHE.misses - misses,
+                )
+
+                future = None
+                if error is None and output is not None:
+                    slots.acquire()
+                    future = writers.submit(
+                        write_job, page, output, page_profile, slots, if_changed
+                    )
+                result = PageResult(
+                    used_template, error, page_profile, cache_stats, written
+                )
+                pending.append((page, future, result))
+
+                # Report finished pages as soon as everything before them is
+                while pending and (pending[0][1] is None or pending[0][1].done()):
+                    yield finish(*pending.popleft())
+
+            while pending:
+                yield finish(*pending.popleft())
+    finally:
+        # Unblock the reader if the caller stopped early
+        stop.set()
+        while reader.is_alive():
+            try:
+                sources.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def read_pages(pages, sources, stop, profile=False):
+    for from_path, dest_path in pages:
+        if stop.is_set():
+            return
+        page_profile = PageProfile(from_path) if profile else None
+        try:
+            markdown, error = read_page(from_path), None
+        except Exception as e:
+            markdown, error = None, describe_error(e)
+        if page_profile is not None:
+            page_profile.mark("read")
+            if error is None:
+                page_profile.bytes_in = os.path.getsize(from_path)
+        sources.put(((from_path, dest_path), markdown, error, page_profile))
+    sources.put(None)
+
+
+def write_job(page, output, page_profile, slots=None, if_changed=False):
+    try:
+        if page_profile is not None:
+            page_profile.restart()
+        written = write_output(page[1], output, if_changed)
+        if page_profile is not None:
+            page_profile.mark("write")
+            page_profile.bytes_out = os.path.getsize(page[1])
+        return written
+    finally:
+        if slots is not None:
+            slots.release()
+
+
+def write_output(dest_path, output, if_changed=False):
+    # output is rendered HTML, or a (template, values) pair to stream
+    if isinstance(output, str):
+        return write_page(dest_path, output, if_changed)
+    stream_page(dest_path, *output)
+    return True
+
+
+def finish(page, future, result):
+    # Waits for the page's write, if any, and folds its failure into result
+    if future is None:
+        return page, result
+    try:
+        written = future.result()
+    except Exception as e:
+        return page, result._replace(
+            template=None, error=describe_error(e), profile=None
+        )
+    return page, result._replace(written=written)
+
+
+def describe_error(e):
+    return f"{type(e).__name__}: {e}"
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+PROFILE_PATH = os.path.join(".ssg", "profile.json")
+# Blocks are rendered to HTML as they are parsed, since that is where the
+# fragment cache serves repeated ones, so "parse" includes block rendering and
+# "render" is filling the template. bench.py separates the two.
+PAGE_STAGES = ("read", "parse", "render", "write")
+
+
+class PageProfile:
+    def __init__(self, path):
+        self.path = path
+        self.stages = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        # Charges the time since the previous mark to stage
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def restart(self):
+        # Starts timing afresh, e.g. so time spent waiting in a queue between
+        # pipeline stages is not charged to the next stage
+        self._last = time.perf_counter()
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "stages": self.stages,
+            "total": self.total,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+class BuildProfile:
+    def __init__(self):
+        self.pages = []
+
+    def add(self, page_profile):
+        self.pages.append(page_profile)
+
+    def stage_totals(self):
+        totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for page in self.pages:
+            for stage, seconds in page.stages.items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def slowest(self, count=10):
+        return sorted(self.pages, key=lambda page: page.total, reverse=True)[:count]
+
+    def to_dict(self):
+        return {
+            "pages": [page.to_dict() for page in self.pages],
+            "stages": self.stage_totals(),
+            "total": sum(page.total for page in self.pages),
+            "bytes_in": sum(page.bytes_in for page in self.pages),
+            "bytes_out": sum(page.bytes_out for page in self.pages),
+        }
+
+    def save(self, path=PROFILE_PATH):
+        dest_dir = os.path.dirname(path)
+        if dest_dir and not os.path.exists(dest_dir):
+            os.makedirs(dest_dir)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self, count=10):
+        print(f"Slowest {min(count, len(self.pages))} of {len(self.pages)} pages:")
+        header = "".join(f"{stage:>9}" for stage in PAGE_STAGES)
+        print(f"{'total':>9}{header}  {'in':>9} {'out':>9}  path")
+        for page in self.slowest(count):
+            stages = "".join(
+                f"{page.stages.get(stage, 0.0) * 1000:>7.1f}ms" for stage in PAGE_STAGES
+            )
+            print(
+                f"{page.total * 1000:>7.1f}ms{stages}  "
+                f"{page.bytes_in:>9} {page.bytes_out:>9}  {page.path}"
+            )
+
+        totals = self.stage_totals()
+        overall = sum(totals.values()) or 1.0
+        print("Stage totals:")
+        for stage, seconds in totals.items():
+            print(f"{stage:>9} {seconds:>9.3f}s {seconds / overall * 100:>5.1f}%")
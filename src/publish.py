@@ -0,0 +1,167 @@
+import errno
+import os
+import shutil
+from depgraph import COMPRESSED, INCOMPRESSIBLE
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; reflinks are skipped there
+    fcntl = None
+
+# Linux ioctl that makes dst share src's data blocks (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem or platform can't do that", as opposed to
+# a real I/O failure
+UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+}
+
+# (method, source device, destination device) pairs known not to work, so
+# each method is tried once per pair of filesystems rather than once per file
+_unsupported = set()
+
+
+def publish_file(src_path, dst_path, link=False):
+    # Places a copy of src_path at dst_path by the cheapest method that works,
+    # and returns the method's name. Links share storage with the source;
+    # every other method produces an independent file with src's mtime.
+    dst_dir = os.path.dirname(dst_path) or "."
+    devices = (os.stat(src_path).st_dev, os.stat(dst_dir).st_dev)
+    methods = PUBLISH_METHODS if link else PUBLISH_METHODS[1:]
+
+    tmp_path = f"{dst_path}.ssg-tmp"
+    for name, method in methods:
+        if (name, *devices) in _unsupported:
+            continue
+        try:
+            method(src_path, tmp_path)
+        except OSError as e:
+            remove_quietly(tmp_path)
+            if e.errno not in UNSUPPORTED:
+                raise
+            _unsupported.add((name, *devices))
+            continue
+        break
+    else:
+        name = "copy"
+        shutil.copyfile(src_path, tmp_path)
+
+    if name != "hardlink":
+        # Keep the source mtime, which the next sync compares against
+        shutil.copystat(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+    return name
+
+
+def link_file(src_path, dst_path):
+    os.link(src_path, dst_path)
+
+
+def reflink_file(src_path, dst_path):
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks need fcntl")
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def copy_range_file(src_path, dst_path):
+    # The kernel copies between the two files without a trip through
+    # userspace, and may share blocks on filesystems that support it
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                # Some filesystems report 0 instead of failing; the copy is
+                # short, so let the next method try
+                raise OSError(errno.EINVAL, "copy_file_range copied nothing")
+            remaining -= copied
+
+
+def sendfile_file(src_path, dst_path):
+    if not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "sendfile is not available")
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        offset = 0
+        size = os.fstat(src.fileno()).st_size
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+            if sent == 0:
+                raise OSError(errno.EINVAL, "sendfile sent nothing")
+            offset += sent
+
+
+# Cheapest first; hardlinks are only used when asked for
+PUBLISH_METHODS = (
+    ("hardlink", link_file),
+    ("reflink", reflink_file),
+    ("copy_file_range", copy_range_file),
+    ("sendfile", sendfile_file),
+)
+
+
+def link_duplicates(paths):
+    # Hardlinks byte-identical files among paths to each other, so each
+    # distinct asset is stored once. Only files of equal size are hashed.
+    # Returns the number of files turned into links.
+    by_size = {}
+    for path in paths:
+        by_size.setdefault(os.path.getsize(path), []).append(path)
+
+    linked = 0
+    for size, same_size in by_size.items():
+        if len(same_size) < 2 or size == 0:
+            continue
+        # Files already linked together are hashed once
+        hashes = {}
+        by_hash = {}
+        for path in same_size:
+            stat = os.stat(path)
+            inode = (stat.st_dev, stat.st_ino)
+            if inode not in hashes:
+                hashes[inode] = hash_file(path)
+            by_hash.setdefault(hashes[inode], []).append(path)
+        for first, *duplicates in by_hash.values():
+            for path in duplicates:
+                if os.path.samefile(first, path):
+                    continue
+                tmp_path = f"{path}.ssg-tmp"
+                try:
+                    os.link(first, tmp_path)
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED:
+                        raise
+                    return linked
+                os.replace(tmp_path, path)
+                linked += 1
+    return linked
+
+
+def remove_siblings(output, graph):
+    # Deletes the precompressed siblings made from output once it has been
+    # rewritten or removed. Servers that send foo.html.gz whenever it exists
+    # would otherwise keep serving the old content.
+    for kind in (COMPRESSED, INCOMPRESSIBLE):
+        for sibling in graph.dependents([output], kind):
+            graph.remove_output(sibling)
+            if kind == COMPRESSED:
+                remove_quietly(sibling)
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
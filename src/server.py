@@ -0,0 +1,298 @@
+import os
+import socket
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Hot files kept in memory, and the largest file worth keeping; bigger files
+# are sent straight from disk with sendfile
+CACHE_BYTES = 64 * 1024 * 1024
+MAX_CACHED_FILE = 1024 * 1024
+# Seconds an idle keep-alive connection may hold a thread
+KEEPALIVE_TIMEOUT = 15
+# Connections the kernel queues while every thread is busy; the stock
+# server's 5 drops connections as soon as a load test ramps up
+REQUEST_QUEUE_SIZE = 128
+# Precompressed siblings written by --compress, most preferred first
+ENCODINGS = (("zstd", ".zst"), ("gzip", ".gz"))
+
+# A file as last seen on disk: its (mtime, size, inode), its ETag, its mtime
+# for Last-Modified, and its contents when small enough to keep
+CachedFile = namedtuple("CachedFile", ["key", "etag", "mtime", "body"])
+
+
+class FileCache:
+    # LRU of file contents bounded by total bytes. Every lookup stats the
+    # file, so a rebuild is picked up on the next request without any
+    # invalidation; the lock lets every request thread share one cache.
+    def __init__(self, max_bytes=CACHE_BYTES, max_file=MAX_CACHED_FILE):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.files = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached.key == key:
+                self.files.move_to_end(path)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        body = None
+        if stat.st_size <= self.max_file:
+            with open(path, "rb") as f:
+                body = f.read()
+            if len(body) != stat.st_size:
+                # Rewritten while we read it; serve what we got uncached
+                etag = make_etag(stat.st_mtime_ns, len(body))
+                return CachedFile(None, etag, stat.st_mtime, body)
+        cached = CachedFile(
+            key, make_etag(stat.st_mtime_ns, stat.st_size), stat.st_mtime, body
+        )
+        if body is not None:
+            with self.lock:
+                self.remember(path, cached)
+        return cached
+
+    def remember(self, path, cached):
+        # Callers hold the lock
+        old = self.files.pop(path, None)
+        if old is not None:
+            self.size -= len(old.body)
+        self.files[path] = cached
+        self.size += len(cached.body)
+        while self.size > self.max_bytes:
+            _, evicted = self.files.popitem(last=False)
+            self.size -= len(evicted.body)
+
+    def __len__(self):
+        return len(self.files)
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    # Serves a built site with keep-alive, an in-memory cache of hot files,
+    # ETag revalidation, single byte ranges and precompressed siblings.
+    # Directory listings and errors are left to SimpleHTTPRequestHandler.
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # of a kept-alive connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    cache = None
+    basepath = "/"
+
+    def do_GET(self):
+        self.send_static(head=False)
+
+    def do_HEAD(self):
+        self.send_static(head=True)
+
+    def translate_path(self, path):
+        # A site built for /ssg/ links to /ssg/..., which lives at the root
+        # of the output directory
+        if self.basepath != "/" and path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath) :]
+        return super().translate_path(path)
+
+    def send_static(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            # Redirects for directories, listings and 404s
+            if head:
+                super().do_HEAD()
+            else:
+                super().do_GET()
+            return
+
+        # Ranges address the identity encoding, which is what download
+        # managers and media players resuming a transfer expect
+        ranged = "Range" in self.headers
+        file_path, encoding = path, None
+        try:
+            if not ranged:
+                file_path, encoding = self.pick_encoding(path)
+            cached = self.cache.get(file_path)
+        except OSError:
+            # Removed by a rebuild since the check above
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        etag = cached.etag if encoding is None else f'{cached.etag[:-1]}-{encoding}"'
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(etag, cached)
+            self.end_headers()
+            return
+
+        size = cached.key[1] if cached.body is None else len(cached.body)
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        if ranged and etag_matches(self.headers.get("If-Range", etag), etag):
+            byte_range = parse_range(self.headers["Range"], size)
+            if byte_range == ():
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+        length = end - start + 1
+
+        self.send_response(status)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(length))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_validators(etag, cached)
+        self.end_headers()
+        if head or length <= 0:
+            return
+
+        if cached.body is not None:
+            self.wfile.write(memoryview(cached.body)[start : end + 1])
+            return
+        with open(file_path, "rb") as f:
+            sent = self.connection.sendfile(f, start, length)
+        if sent != length:
+            # The file shrank under us; the client can't tell where the
+            # body ends, so end the connection
+            self.close_connection = True
+
+    def send_validators(self, etag, cached):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(cached.mtime))
+        # Previews change under the browser, so it revalidates every time,
+        # which costs a 304 when nothing changed
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def pick_encoding(self, path):
+        # Returns the file to send and its content coding (None for the file
+        # itself). A sibling only counts if it has its original's mtime, so
+        # one left behind by an older build is never served.
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        if not accepted:
+            return path, None
+        mtime = os.stat(path).st_mtime_ns
+        for encoding, extension in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                if os.stat(path + extension).st_mtime_ns == mtime:
+                    return path + extension, encoding
+            except OSError:
+                continue
+        return path, None
+
+    def log_message(self, format, *args):
+        # A line per request on stderr serializes every thread under load
+        pass
+
+
+class PreviewServer(ThreadingHTTPServer):
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response are routine, not errors
+        if isinstance(sys.exc_info()[1], (ConnectionError, socket.timeout)):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_server(
+    directory, port=8888, host="", handler=StaticHandler, basepath="/", cache=None
+):
+    class Handler(handler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+    Handler.cache = cache if cache is not None else FileCache()
+    Handler.basepath = basepath
+    return PreviewServer((host, port), Handler)
+
+
+def serve(directory="docs", port=8888, basepath="/"):
+    server = make_server(directory, port, basepath=basepath)
+    print(f"Serving {directory} at http://localhost:{port}{basepath}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def make_etag(mtime_ns, size):
+    # Derived from the stat rather than the contents, so no file is hashed
+    return f'"{mtime_ns:x}-{size:x}"'
+
+
+def etag_matches(header, etag):
+    # Weak comparison, as If-None-Match calls for
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def accepted_encodings(header):
+    # Content codings from an Accept-Encoding header, minus any with q=0
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    # Returns the (start, end) of a single byte range, inclusive; None when
+    # the header should be ignored (malformed, or several ranges, which are
+    # answered with the whole file); () when no byte of the range exists
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                return ()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start < 0 or (end is not None and end < start):
+        return None
+    if start >= size:
+        return ()
+    return start, size - 1 if end is None else min(end, size - 1)
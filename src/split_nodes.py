@@ -1,5 +1,19 @@
+import re
 from textnode import TextNode, TextType
-from extract_markdown import extract_markdown_images, extract_markdown_links
+from extract_markdown import IMAGE_PATTERN, LINK_PATTERN
+
+# One alternation per kind of inline markup, tried left to right in a single
+# scan. Code spans come first so their contents are never parsed as markup.
+INLINE_PATTERN = re.compile(
+    # The lookahead lets the regex engine skip plain text without trying
+    # every alternative at every position
+    r"(?=[`!\[*_])"
+    r"(?:(?P<code>`[^`]*`)"
+    rf"|(?P<image>{IMAGE_PATTERN.pattern})"
+    rf"|(?P<link>{LINK_PATTERN.pattern})"
+    r"|(?P<emphasis>\*\*|_))"
+)
+EMPHASIS_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC}
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -36,75 +50,102 @@ def split_text_node(node, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-        else:
-            images = extract_markdown_images(node.text)
-            if not images:
-                new_nodes.append(node)
-            else:
-                text = node.text
-                for alt_text, image_url in images:
-                    # Split on the image markdown
-                    sections = text.split(f"![{alt_text}]({image_url})", 1)
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
-                    # Add the text before the image
-                    if sections[0]:
-                        new_nodes.append(TextNode(sections[0], TextType.TEXT))
 
-                    new_nodes.append(TextNode(alt_text, TextType.IMAGE, image_url))
-
-                    # Keep the rest for next iteration
-                    text = sections[1]
-
-                # Add any remaining text after the last image
-                if text:
-                    new_nodes.append(TextNode(text, TextType.TEXT))
-
-    return new_nodes
+def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
 
-def split_nodes_link(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    # Slices text between match offsets in one pass, instead of splitting the
+    # remaining text again for every match
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
-        else:
-            links = extract_markdown_links(node.text)
-            if not links:
-                new_nodes.append(node)
-            else:
-                text = node.text
-                for link_text, link_url in links:
-                    # Split on the link markdown
-                    sections = text.split(f"[{link_text}]({link_url})", 1)
-
-                    # Add the text before the link
-                    if sections[0]:
-                        new_nodes.append(TextNode(sections[0], TextType.TEXT))
-
-                    new_nodes.append(TextNode(link_text, TextType.LINK, link_url))
-
-                    # Keep the rest for next iteration
-                    text = sections[1]
-
-                # Add any remaining text after the last link
-                if text:
-                    new_nodes.append(TextNode(text, TextType.TEXT))
+            continue
+
+        text = node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            # Add the text before the match
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos : match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+
+        if pos == 0:
+            new_nodes.append(node)
+        # Add any remaining text after the last match
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
 
     return new_nodes
 
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    # Filter out empty text nodes
-    nodes = [node for node in nodes if node.text]
-
-    return nodes
+    nodes = []
+    append = nodes.append
+    # Open emphasis delimiter -> (index of its node, end offset in text).
+    # Closing one delimiter drops every opener above it, so there is never
+    # more than one opener per delimiter and a span is folded into an
+    # enclosing one at most twice, which keeps the scan linear.
+    openers = {}
+    pos = 0
+
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        kind = match.lastgroup
+
+        if kind == "emphasis":
+            marker = match.group()
+            opener = openers.get(marker)
+            if opener is not None:
+                # Everything since the opener, markup included, is the span
+                index, inner_start = opener
+                del nodes[index:]
+                append(TextNode(text[inner_start:start], EMPHASIS_DELIMITERS[marker]))
+                if len(openers) == 1:
+                    openers = {}
+                else:
+                    openers = {
+                        key: value for key, value in openers.items() if value[0] < index
+                    }
+                pos = match.end()
+                continue
+
+        if pos < start:
+            append(TextNode(text[pos:start], TextType.TEXT))
+        pos = match.end()
+
+        if kind == "code":
+            append(TextNode(text[start + 1 : pos - 1], TextType.CODE))
+        elif kind == "image":
+            append(TextNode(match.group(3), TextType.IMAGE, match.group(4)))
+        elif kind == "link":
+            append(TextNode(match.group(6), TextType.LINK, match.group(7)))
+        else:
+            # Stays literal text unless a matching closer turns up
+            openers[marker] = (len(nodes), pos)
+            append(TextNode(marker, TextType.TEXT))
+
+    if pos < len(text):
+        append(TextNode(text[pos:], TextType.TEXT))
+
+    if openers:
+        # Unmatched delimiters are plain text: merge them with their neighbours
+        merged = []
+        for node in nodes:
+            if (
+                merged
+                and node.text_type == TextType.TEXT
+                and merged[-1].text_type == TextType.TEXT
+            ):
+                merged[-1] = TextNode(merged[-1].text + node.text, TextType.TEXT)
+            else:
+                merged.append(node)
+        nodes = merged
+
+    # Filter out empty nodes
+    return [node for node in nodes if node.text]
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import itertools
+import os
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+LAYOUT_PATTERN = re.compile(r"<!--\s*layout:\s*([\w-]+)\s*-->")
+# Root-relative href and src attributes, but not protocol-relative //host ones
+ROOT_URL_PATTERN = re.compile(r'\b(href|src)="/(?!/)')
+
+
+class Template:
+    def __init__(self, text, path=None, basepath="/"):
+        self.path = path
+        self.digest = hashlib.sha256(text.encode()).hexdigest()
+
+        # Apply the basepath once at load, so rendering never rewrites
+        if basepath != "/":
+            text = ROOT_URL_PATTERN.sub(
+                lambda match: f'{match.group(1)}="{basepath}', text
+            )
+
+        # Split once into static chunks around each {{ Slot }}, so rendering
+        # is a single join instead of a replace per placeholder
+        self.chunks = []
+        self.slots = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.chunks.append(text[pos : match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.chunks.append(text[pos:])
+
+    @classmethod
+    def load(cls, path, basepath="/"):
+        with open(path, "r") as f:
+            return cls(f.read(), path, basepath)
+
+    def render(self, values):
+        fp = io.StringIO()
+        self.write(fp, values)
+        return fp.getvalue()
+
+    def write(self, fp, values):
+        # Values may be strings or nodes; nodes are streamed straight to fp
+        fp.write(self.chunks[0])
+        for (name, placeholder), chunk in zip(self.slots, self.chunks[1:]):
+            # Unknown placeholders are left in the output untouched
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                fp.write(value)
+            else:
+                value.write_html(fp)
+            fp.write(chunk)
+
+
+class TemplateRegistry:
+    def __init__(self, default_path, basepath="/"):
+        self.default_path = default_path
+        self.basepath = basepath
+        self.layout_dir = os.path.join(os.path.dirname(default_path), "layouts")
+        self.templates = {}
+
+    def layout_path(self, layout=None):
+        if layout is None:
+            return self.default_path
+        return os.path.join(self.layout_dir, f"{layout}.html")
+
+    def get(self, layout=None):
+        path = self.layout_path(layout)
+        template = self.templates.get(path)
+        if template is None:
+            if layout is not None and not os.path.isfile(path):
+                raise ValueError(f"Unknown layout: {layout}")
+            template = Template.load(path, self.basepath)
+            self.templates[path] = template
+        return template
+
+    def load_all(self):
+        # Compile the default template and every layout up front so the
+        # registry can be handed to workers fully populated
+        self.get()
+        if os.path.isdir(self.layout_dir):
+            for entry in sorted(os.listdir(self.layout_dir)):
+                if entry.endswith(".html"):
+                    self.get(entry[: -len(".html")])
+        return self
+
+    def fingerprint(self):
+        return {path: template.digest for path, template in self.templates.items()}
+
+
+def extract_layout(markdown):
+    # A page picks a layout with a first-line comment: <!-- layout: name -->
+    first_line, _, rest = markdown.partition("\n")
+    match = LAYOUT_PATTERN.fullmatch(first_line.strip())
+    if match is None:
+        return None, markdown
+    return match.group(1), rest
+
+
+def extract_layout_lines(lines):
+    # The same for an iterable of lines, which is only read past the first
+    lines = iter(lines)
+    first_line = next(lines, "")
+    match = LAYOUT_PATTERN.fullmatch(first_line.strip())
+    if match is None:
+        return None, itertools.chain((first_line,), lines)
+    return match.group(1), lines
@@ -24,6 +24,10 @@ class TestBlockToBlockType(unittest.TestCase):
         block = "#No space"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_heading_markers_only(self):
+        block = "###"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
     def test_code_block(self):
         block = "```\ncode here\n```"
         self.assertEqual(block_to_block_type(block), BlockType.CODE)
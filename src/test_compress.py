@@ -0,0 +1,113 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+import compress
+from compress import available_formats, compress_output, compress_outputs
+from depgraph import DependencyGraph
+from publish import remove_siblings
+
+HTML = b"<p>" + b"hello world " * 200 + b"</p>"
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "docs")
+        self.page = os.path.join(self.root, "blog", "index.html")
+        self.write(self.page, HTML)
+        self.graph = DependencyGraph(os.path.join(self.tmp.name, "deps.sqlite"))
+        self.gzip_only = [(".gz", compress.gzip_compress)]
+
+    def tearDown(self):
+        self.graph.close()
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def compress(self, graph=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return compress_outputs(self.root, graph, self.gzip_only, threads=2)
+
+    def test_writes_gzip_sibling_with_original_mtime(self):
+        os.utime(self.page, ns=(10**9, 10**9))
+        self.assertEqual(self.compress(), {self.page: [self.page + ".gz"]})
+        with gzip.open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), HTML)
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, 10**9)
+
+    def test_output_is_reproducible(self):
+        self.compress()
+        with open(self.page + ".gz", "rb") as f:
+            first = f.read()
+        os.remove(self.page + ".gz")
+        self.compress()
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_skips_incompressible_and_tiny_files(self):
+        image = os.path.join(self.root, "cat.png")
+        tiny = os.path.join(self.root, "tiny.css")
+        self.write(image, HTML)
+        self.write(tiny, b"a{}")
+        self.compress()
+        self.assertFalse(os.path.exists(image + ".gz"))
+        self.assertFalse(os.path.exists(tiny + ".gz"))
+
+    def test_unchanged_outputs_are_skipped(self):
+        self.assertIn(self.page, self.compress(self.graph))
+        self.assertEqual(self.compress(self.graph), {})
+
+        self.write(self.page, HTML + b"<p>more</p>")
+        self.assertIn(self.page, self.compress(self.graph))
+        with gzip.open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), HTML + b"<p>more</p>")
+
+    def test_incompressible_outputs_are_not_retried(self):
+        tiny = os.path.join(self.root, "tiny.css")
+        self.write(tiny, b"a{}")
+        self.compress(self.graph)
+        self.assertEqual(self.compress(self.graph), {})
+        self.assertFalse(os.path.exists(tiny + ".gz"))
+
+        self.write(tiny, b"a{}" * 100)
+        self.assertIn(tiny, self.compress(self.graph))
+        self.assertTrue(os.path.exists(tiny + ".gz"))
+
+    def test_remove_siblings(self):
+        self.compress(self.graph)
+        remove_siblings(self.page, self.graph)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        # With its record gone, the next run compresses the page again
+        self.assertIn(self.page, self.compress(self.graph))
+
+    def test_missing_sibling_is_rewritten(self):
+        self.compress(self.graph)
+        os.remove(self.page + ".gz")
+        self.assertIn(self.page, self.compress(self.graph))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+
+    def test_orphaned_siblings_are_removed(self):
+        asset = os.path.join(self.root, "archive.tar.gz")
+        self.write(asset, b"not ours")
+        self.compress(self.graph)
+        os.remove(self.page)
+        self.compress(self.graph)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        # A .gz file the build did not produce is left alone
+        self.assertTrue(os.path.exists(asset))
+
+    @unittest.skipUnless(len(available_formats()) > 1, "zstd is not available")
+    def test_zstd_sibling(self):
+        _, siblings = compress_output(self.page, available_formats())
+        self.assertEqual(siblings, [self.page + ".gz", self.page + ".zst"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import copy_static
+from copy_static import copy_directory_contents, sync_static
+from manifest import BuildManifest
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, use_hash=False, link=False):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            sync_static(self.source, self.dest, self.manifest, use_hash, link)
+        return out.getvalue()
+
+    def test_first_sync_copies_everything(self):
+        log = self.sync()
+        self.assertIn("2 copied, 0 unchanged, 0 removed", log)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+        self.assertEqual(self.manifest.assets, ["images/a.png", "index.css"])
+
+    def test_second_sync_leaves_files_untouched(self):
+        self.sync()
+        dest_css = os.path.join(self.dest, "index.css")
+        before = os.stat(dest_css).st_ino
+        log = self.sync()
+        self.assertIn("0 copied, 2 unchanged, 0 removed", log)
+        self.assertEqual(os.stat(dest_css).st_ino, before)
+
+    def test_changed_asset_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.source, "index.css"), "body { margin: 0 }")
+        log = self.sync()
+        self.assertIn("1 copied, 1 unchanged", log)
+
+    def test_many_assets_with_progress_summary(self):
+        for i in range(200):
+            self.write(os.path.join(self.source, "img", f"{i % 7}", f"{i}.txt"), str(i))
+        with mock.patch.object(copy_static, "PROGRESS_INTERVAL", 0):
+            log = self.sync()
+        self.assertIn("202 copied, 0 unchanged", log)
+        self.assertIn("Publishing static assets: 202/202", log)
+        self.assertNotIn("Copying file", log)
+        with open(os.path.join(self.dest, "img", "3", "150.txt")) as f:
+            self.assertEqual(f.read(), "150")
+
+    def test_copy_errors_are_raised(self):
+        os.makedirs(os.path.join(self.dest, "index.css", "blocker"))
+        with self.assertRaises(OSError):
+            self.sync()
+
+    def test_link_mode_shares_files_and_dedupes(self):
+        self.write(os.path.join(self.source, "images", "b.png"), "png")
+        log = self.sync(link=True)
+        self.assertIn(": 3 by hardlink", log)
+        self.assertIn("1 identical asset(s) hardlinked together", log)
+        dest_a = os.path.join(self.dest, "images", "a.png")
+        dest_b = os.path.join(self.dest, "images", "b.png")
+        self.assertTrue(os.path.samefile(dest_a, dest_b))
+        src_css = os.path.join(self.source, "index.css")
+        self.assertTrue(os.path.samefile(src_css, os.path.join(self.dest, "index.css")))
+
+        log = self.sync(link=True)
+        self.assertIn("unchanged", log)
+        self.assertIn("index.css", self.manifest.assets)
+
+    def test_link_mode_keeps_earlier_duplicates_linked(self):
+        dest_a = os.path.join(self.dest, "images", "a.png")
+        dest_b = os.path.join(self.dest, "images", "b.png")
+        src_b = os.path.join(self.source, "images", "b.png")
+        self.write(src_b, "png")
+        os.utime(src_b, ns=(10**9, 10**9))
+        self.sync(link=True)
+
+        log = self.sync(link=True)
+        self.assertIn("0 copied, 3 unchanged", log)
+        self.assertTrue(os.path.samefile(dest_a, dest_b))
+
+        # A duplicate added later is linked to the assets already published
+        src_c = os.path.join(self.source, "images", "c.png")
+        self.write(src_c, "png")
+        self.sync(link=True)
+        self.assertTrue(
+            os.path.samefile(dest_a, os.path.join(self.dest, "images", "c.png"))
+        )
+
+        self.write(src_b, "gif")
+        self.sync(link=True)
+        self.assertFalse(os.path.samefile(dest_a, dest_b))
+        with open(dest_b) as f:
+            self.assertEqual(f.read(), "gif")
+
+    def test_republished_asset_drops_its_siblings(self):
+        self.sync()
+        dst_css = os.path.join(self.dest, "index.css")
+        self.write(dst_css + ".gz", "old")
+        self.manifest.graph.record_compressed(dst_css + ".gz", dst_css, "h1")
+        self.write(os.path.join(self.source, "index.css"), "body { color: red }")
+        self.sync()
+        self.assertFalse(os.path.exists(dst_css + ".gz"))
+
+    def test_hash_mode_ignores_mtime(self):
+        self.sync()
+        src_css = os.path.join(self.source, "index.css")
+        stat = os.stat(src_css)
+        os.utime(src_css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        log = self.sync(use_hash=True)
+        self.assertIn("0 copied, 2 unchanged", log)
+
+    def test_orphans_are_removed(self):
+        self.sync()
+        page = os.path.join(self.dest, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        log = self.sync()
+        self.assertIn("1 removed", log)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        # Files the sync did not create are never treated as orphans
+        self.assertTrue(os.path.exists(page))
+
+
+class TestCopyDirectoryContents(unittest.TestCase):
+    def test_copies_tree(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "static")
+            dst = os.path.join(tmp, "docs")
+            for rel_path in ["a.css", os.path.join("x", "y", "b.png")]:
+                path = os.path.join(src, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(rel_path)
+            os.mkdir(dst)
+            with contextlib.redirect_stdout(io.StringIO()):
+                published = copy_directory_contents(src, dst)
+            self.assertEqual(
+                published,
+                [os.path.join(dst, "a.css"), os.path.join(dst, "x", "y", "b.png")],
+            )
+            with open(published[1]) as f:
+                self.assertEqual(f.read(), os.path.join("x", "y", "b.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
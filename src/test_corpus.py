@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bench import compare_results
+from corpus import generate_markdown, write_corpus
+from markdown_to_html import markdown_to_html_node
+
+
+class TestGenerateMarkdown(unittest.TestCase):
+    def test_same_seed_same_document(self):
+        first = generate_markdown(5000, random.Random(1))
+        second = generate_markdown(5000, random.Random(1))
+        self.assertEqual(first, second)
+
+    def test_reaches_requested_size(self):
+        markdown = generate_markdown(5000, random.Random(1))
+        self.assertGreaterEqual(len(markdown), 5000)
+        self.assertTrue(markdown.startswith("# "))
+
+    def test_documents_render(self):
+        for adversarial in (False, True):
+            markdown = generate_markdown(20000, random.Random(2), adversarial)
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertTrue(html.startswith("<div><h1>"))
+
+
+class TestWriteCorpus(unittest.TestCase):
+    def test_write_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_corpus(tmp, 3, 1000, seed=1)
+            self.assertEqual(len(paths), 3)
+            self.assertTrue(all(os.path.getsize(path) >= 1000 for path in paths))
+
+
+class TestCompareResults(unittest.TestCase):
+    def test_compare_results_flags_regressions(self):
+        baseline = {
+            "stages": {"tree": {"mb_per_sec": 10.0}, "write": {"mb_per_sec": 10.0}},
+            "total": {"mb_per_sec": 5.0},
+        }
+        results = {
+            "stages": {"tree": {"mb_per_sec": 8.0}, "write": {"mb_per_sec": 9.5}},
+            "total": {"mb_per_sec": 5.0},
+        }
+        self.assertEqual(
+            compare_results(results, baseline, threshold=0.1),
+            [
+                ("tree", 10.0, 8.0, True),
+                ("write", 10.0, 9.5, False),
+                ("total", 5.0, 5.0, False),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import ASSET, COMPRESSED, SOURCE, TEMPLATE, DependencyGraph
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, ".ssg", "deps.sqlite")
+        self.graph = DependencyGraph(self.path)
+
+    def tearDown(self):
+        self.graph.close()
+        self.tmp.cleanup()
+
+    def test_not_created_until_used(self):
+        self.graph.save()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_record_page(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.assertEqual(self.graph.inputs("docs/a.html", SOURCE), ["content/a.md"])
+        self.assertEqual(self.graph.inputs("docs/a.html", TEMPLATE), ["template.html"])
+        self.assertEqual(
+            self.graph.inputs("docs/a.html"), ["content/a.md", "template.html"]
+        )
+
+    def test_dependents(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.graph.record_page("docs/b.html", "content/b.md", "layouts/post.html", "d2")
+        self.graph.record_asset("docs/index.css", "static/index.css")
+        self.assertEqual(self.graph.dependents(["template.html"]), ["docs/a.html"])
+        self.assertEqual(
+            self.graph.dependents(["content/b.md", "template.html"]),
+            ["docs/a.html", "docs/b.html"],
+        )
+        self.assertEqual(
+            self.graph.dependents(["static/index.css"], ASSET), ["docs/index.css"]
+        )
+        self.assertEqual(self.graph.dependents(["static/index.css"], SOURCE), [])
+
+    def test_rerecording_replaces_inputs(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.graph.record_page("docs/a.html", "content/a.md", "layouts/post.html", "d2")
+        self.assertEqual(self.graph.dependents(["template.html"]), [])
+        self.assertEqual(self.graph.dependents(["layouts/post.html"]), ["docs/a.html"])
+
+    def test_templates_current(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.assertTrue(
+            self.graph.templates_current("docs/a.html", {"template.html": "d1"})
+        )
+        self.assertFalse(
+            self.graph.templates_current("docs/a.html", {"template.html": "d2"})
+        )
+        self.assertFalse(self.graph.templates_current("docs/a.html", {}))
+        # Outputs the graph knows nothing about are never current
+        self.assertFalse(
+            self.graph.templates_current("docs/b.html", {"template.html": "d1"})
+        )
+
+    def test_edges(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.graph.record_compressed("docs/a.html.gz", "docs/a.html", "h1")
+        self.assertEqual(
+            self.graph.edges(COMPRESSED), [("docs/a.html.gz", "docs/a.html", "h1")]
+        )
+
+    def test_remove_output(self):
+        self.graph.record_asset("docs/index.css", "static/index.css")
+        self.graph.remove_output("docs/index.css")
+        self.assertEqual(self.graph.inputs("docs/index.css"), [])
+
+    def test_persists_after_save(self):
+        self.graph.record_page("docs/a.html", "content/a.md", "template.html", "d1")
+        self.graph.save()
+        self.graph.close()
+        reopened = DependencyGraph(self.path)
+        self.assertEqual(reopened.dependents(["content/a.md"]), ["docs/a.html"])
+        reopened.close()
+
+    def test_corrupt_database_starts_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("not a database" * 100)
+        self.assertEqual(self.graph.inputs("docs/a.html"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from block_types import BlockType
+from fragment_cache import (
+    FLUSH_EVERY,
+    RENDERER_VERSION,
+    FragmentCache,
+    FragmentStore,
+    format_stats,
+    fragment_key,
+)
+from htmlnode import ParentNode
+from markdown_to_html import block_to_html_node, markdown_to_html_node
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_get_miss_then_hit(self):
+        cache = FragmentCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = FragmentCache(max_bytes=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+
+    def test_bounded_by_total_size(self):
+        cache = FragmentCache(max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.put("a", "123")
+        self.assertEqual(cache.size, 8)
+        cache.put("c", "1234")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.size, 7)
+
+    def test_oversized_fragments_are_not_cached(self):
+        cache = FragmentCache(max_bytes=100, max_fragment=10)
+        cache.put("small", "<p>a</p>")
+        cache.put("large", "<p>" + "a" * 20 + "</p>")
+        self.assertIsNone(cache.get("large"))
+        self.assertEqual(cache.get("small"), "<p>a</p>")
+
+    def test_clear_resets_stats(self):
+        cache = FragmentCache()
+        cache.put("a", "1")
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+        self.assertEqual(cache.hit_rate, 0.0)
+
+    def test_shared_across_threads(self):
+        cache = FragmentCache(max_bytes=100)
+
+        def work(offset):
+            for i in range(1000):
+                key = (offset + i) % 100
+                if cache.get(key) is None:
+                    cache.put(key, str(key))
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.hits + cache.misses, 8000)
+        self.assertLessEqual(cache.size, 100)
+
+    def test_key_depends_on_source_and_type(self):
+        key = fragment_key(["text"], BlockType.PARAGRAPH)
+        self.assertEqual(key, fragment_key(["text"], BlockType.PARAGRAPH))
+        self.assertNotEqual(key, fragment_key(["text"], BlockType.HEADING))
+        self.assertNotEqual(key, fragment_key(["text", ""], BlockType.PARAGRAPH))
+
+    def test_format_stats(self):
+        self.assertEqual(
+            format_stats(3, 1), "Fragment cache: 3 hits, 1 misses (75.0% hit rate)"
+        )
+        self.assertEqual(
+            format_stats(0, 0), "Fragment cache: 0 hits, 0 misses (0.0% hit rate)"
+        )
+
+
+class TestBlockFragmentCache(unittest.TestCase):
+    def test_repeated_block_hits_cache(self):
+        cache = FragmentCache()
+        lines = ["A **bold** bio"]
+        first = block_to_html_node(lines, BlockType.PARAGRAPH, cache)
+        second = block_to_html_node(lines, BlockType.PARAGRAPH, cache)
+        self.assertEqual(first.to_html(), "<p>A <b>bold</b> bio</p>")
+        self.assertEqual(second.to_html(), first.to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cache_none_returns_tree(self):
+        node = block_to_html_node(["- a", "- b"], BlockType.UNORDERED_LIST, None)
+        self.assertIsInstance(node, ParentNode)
+        self.assertEqual(node.to_html(), "<ul><li>a</li><li>b</li></ul>")
+
+    def test_cached_page_matches_uncached(self):
+        md = "# Title\n\nBio\n\n- a\n- b\n\nBio\n\n```\ncode\n```"
+        cache = FragmentCache()
+        cached = markdown_to_html_node(md, cache).to_html()
+        self.assertEqual(cached, markdown_to_html_node(md, None).to_html())
+        self.assertEqual(cache.hits, 1)
+
+
+class TestFragmentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.key = fragment_key(["Bio"], BlockType.PARAGRAPH)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, version=RENDERER_VERSION):
+        return FragmentStore(os.path.join(self.tmp.name, "fragments.sqlite"), version)
+
+    def test_round_trip(self):
+        store = self.store()
+        self.assertIsNone(store.get(self.key))
+        store.put(self.key, "<p>Bio</p>")
+        # Held back until the batch is committed
+        self.assertIsNone(self.store().get(self.key))
+        store.flush()
+        self.assertEqual(self.store().get(self.key), "<p>Bio</p>")
+
+    def test_full_batches_are_committed(self):
+        store = self.store()
+        for i in range(FLUSH_EVERY):
+            store.put(fragment_key([str(i)], BlockType.PARAGRAPH), f"<p>{i}</p>")
+        self.assertEqual(
+            self.store().get(fragment_key(["0"], BlockType.PARAGRAPH)), "<p>0</p>"
+        )
+
+    def test_pickled_store_opens_its_own_connection(self):
+        store = self.store()
+        store.put(self.key, "<p>Bio</p>")
+        store.flush()
+        copy = pickle.loads(pickle.dumps(store))
+        self.assertEqual(copy.get(self.key), "<p>Bio</p>")
+
+    def test_renderer_version_isolates_fragments(self):
+        old = self.store(version=1)
+        old.put(self.key, "<p>old</p>")
+        old.flush()
+        self.assertIsNone(self.store(version=2).get(self.key))
+
+    def test_corrupt_store_starts_empty(self):
+        with open(os.path.join(self.tmp.name, "fragments.sqlite"), "w") as f:
+            f.write("not a database")
+        self.assertIsNone(self.store().get(self.key))
+
+    def test_prune_removes_old_versions_and_unused_fragments(self):
+        old = self.store(version=1)
+        old.put(self.key, "<p>old</p>")
+        old.flush()
+        store = self.store(version=2)
+        unused = fragment_key(["Gone"], BlockType.PARAGRAPH)
+        store.put(self.key, "<p>Bio</p>")
+        store.put(unused, "<p>Gone</p>")
+        store.flush()
+        with sqlite3.connect(store.path) as connection:
+            connection.execute("UPDATE fragments SET used = 0")
+        # Reading a fragment marks it as used
+        store.get(self.key)
+
+        self.assertEqual(store.prune(), 2)
+        self.assertEqual(store.get(self.key), "<p>Bio</p>")
+        self.assertIsNone(store.get(unused))
+        self.assertIsNone(old.get(self.key))
+
+    def test_prune_empty_store(self):
+        store = FragmentStore(os.path.join(self.tmp.name, "missing.sqlite"))
+        self.assertEqual(store.prune(), 0)
+        self.assertFalse(os.path.exists(store.path))
+
+    def test_cache_survives_between_runs(self):
+        md = "# Post\n\nFirst paragraph\n\nSecond paragraph"
+        first = FragmentCache(store=self.store())
+        markdown_to_html_node(md, first)
+        first.flush()
+        self.assertEqual((first.hits, first.misses), (0, 3))
+
+        # A fresh process only reparses the edited block
+        second = FragmentCache(store=self.store())
+        html = markdown_to_html_node(md.replace("Second", "Edited"), second).to_html()
+        self.assertEqual((second.hits, second.misses), (2, 1))
+        self.assertEqual(
+            html,
+            "<div><h1>Post</h1><p>First paragraph</p><p>Edited paragraph</p></div>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import generate_page
+from fragment_cache import FRAGMENT_CACHE, FragmentStore
+from manifest import BuildManifest
+from generate_pages import collect_pages, generate_pages_recursive
+from profiler import BuildProfile
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+def pages_only(log):
+    return [line for line in log.splitlines() if line.startswith("Generating page")]
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "b", "index.md"), "# B")
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A")
+        self.write(os.path.join(self.content, "notes.txt"), "not markdown")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def generate(self, jobs, profile=None):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, jobs=jobs, profile=profile
+            )
+        return out.getvalue()
+
+    def test_collect_pages_is_sorted(self):
+        pages = collect_pages(self.content, self.dest)
+        self.assertEqual(
+            [os.path.relpath(dest, self.dest) for _, dest in pages],
+            [
+                os.path.join("blog", "a", "index.html"),
+                os.path.join("blog", "b", "index.html"),
+                "index.html",
+            ],
+        )
+
+    def test_parallel_matches_serial(self):
+        serial_log = self.generate(jobs=1)
+        serial = self.read(os.path.join(self.dest, "blog", "a", "index.html"))
+
+        parallel_log = self.generate(jobs=2)
+        parallel = self.read(os.path.join(self.dest, "blog", "a", "index.html"))
+
+        self.assertEqual(serial, "<title>A</title><main><div><h1>A</h1></div></main>")
+        self.assertEqual(serial, parallel)
+        # Cache statistics depend on what each worker has already seen
+        self.assertEqual(pages_only(serial_log), pages_only(parallel_log))
+
+    def test_reports_fragment_cache_stats(self):
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A\n\nBio")
+        self.write(os.path.join(self.content, "blog", "b", "index.md"), "# B\n\nBio")
+        FRAGMENT_CACHE.clear()
+        log = self.generate(jobs=1)
+        self.assertIn("Fragment cache: 1 hits, 4 misses (20.0% hit rate)", log)
+
+    def test_workers_commit_fragments_to_the_store(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                path = os.path.join(self.tmp.name, f"fragments-{jobs}.sqlite")
+                with mock.patch.object(FRAGMENT_CACHE, "store", FragmentStore(path)):
+                    FRAGMENT_CACHE.clear()
+                    self.generate(jobs=jobs)
+                with sqlite3.connect(path) as connection:
+                    (count,) = connection.execute(
+                        "SELECT COUNT(*) FROM fragments"
+                    ).fetchone()
+                # One heading per page
+                self.assertEqual(count, 3)
+
+    def test_basepath_rewrites_links_but_not_code(self):
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(
+            os.path.join(self.content, "index.md"),
+            '# Home\n\n[Blog](/blog/)\n\n```\nhref="/raw"\n```',
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, basepath="/ssg/"
+            )
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "index.html")),
+            '<link href="/ssg/index.css"><div><h1>Home</h1>'
+            '<p><a href="/ssg/blog/">Blog</a></p>'
+            '<pre><code>href="/raw"\n</code></pre></div>',
+        )
+
+    def test_if_changed_reports_written_and_skipped(self):
+        self.generate(jobs=1)
+        home = os.path.join(self.dest, "index.html")
+        os.utime(home, ns=(0, 0))
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A2")
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, jobs=2, if_changed=True
+            )
+        log = out.getvalue()
+        self.assertIn("Pages written: 1, unchanged and skipped: 2", log)
+        self.assertIn(f"Unchanged output, not rewritten: {home}", log)
+        self.assertEqual(os.stat(home).st_mtime_ns, 0)
+
+    def test_rewritten_pages_drop_compressed_siblings(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, ".ssg", "manifest.json"))
+        home = os.path.join(self.dest, "index.html")
+        post = os.path.join(self.dest, "blog", "a", "index.html")
+        self.generate(jobs=1)
+        for path in (home, post):
+            self.write(path + ".gz", "old")
+            manifest.graph.record_compressed(path + ".gz", path, "h1")
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A2")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                manifest=manifest,
+                if_changed=True,
+            )
+        self.assertFalse(os.path.exists(post + ".gz"))
+        # Pages left untouched keep theirs
+        self.assertTrue(os.path.exists(home + ".gz"))
+        manifest.graph.close()
+
+    def test_hardlinked_output_is_replaced_not_written_through(self):
+        # With --link-assets a static file can sit where a page is generated
+        static = os.path.join(self.tmp.name, "static", "index.html")
+        self.write(static, "<p>static</p>")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                home = os.path.join(self.dest, "index.html")
+                if os.path.exists(home):
+                    os.remove(home)
+                os.makedirs(self.dest, exist_ok=True)
+                os.link(static, home)
+                self.generate(jobs=jobs)
+                self.assertEqual(self.read(static), "<p>static</p>")
+                self.assertIn("<h1>Home</h1>", self.read(home))
+                self.assertFalse(os.path.exists(home + ".ssg-tmp"))
+
+    def test_profile_collects_every_page(self):
+        profile = BuildProfile()
+        self.generate(jobs=2, profile=profile)
+        self.assertEqual(len(profile.pages), 3)
+        page = profile.pages[-1]
+        self.assertEqual(set(page.stages), {"read", "parse", "render", "write"})
+        self.assertEqual(page.bytes_in, len("# Home"))
+        self.assertGreater(page.bytes_out, 0)
+
+    def test_page_layout(self):
+        self.write(
+            os.path.join(self.tmp.name, "layouts", "post.html"),
+            "<article>{{ Content }}</article>",
+        )
+        self.write(
+            os.path.join(self.content, "blog", "a", "index.md"),
+            "<!-- layout: post -->\n# A",
+        )
+        self.generate(jobs=2)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "a", "index.html")),
+            "<article><div><h1>A</h1></div></article>",
+        )
+
+    def test_large_sources_are_mapped(self):
+        markdown = (
+            "<!-- layout: post -->\r\n# Caf\u00e9\r\n\r\n"
+            "```\r\ncode\r\n\r\nmore\r\n```\r\n\r\n- one\r\n- two\r\n"
+        )
+        self.write(
+            os.path.join(self.tmp.name, "layouts", "post.html"),
+            "<article>{{ Title }}{{ Content }}</article>",
+        )
+        path = os.path.join(self.content, "blog", "a", "index.md")
+        with open(path, "w", newline="") as f:
+            f.write(markdown)
+        self.generate(jobs=1)
+        expected = self.read(os.path.join(self.dest, "blog", "a", "index.html"))
+
+        with mock.patch.object(generate_page, "MMAP_THRESHOLD", 0):
+            self.assertNotIsInstance(generate_page.read_page(path), str)
+            FRAGMENT_CACHE.clear()
+            self.generate(jobs=1)
+        self.assertEqual(
+            self.read(os.path.join(self.dest, "blog", "a", "index.html")), expected
+        )
+        self.assertIn("<article>Caf\u00e9<div><h1>", expected)
+
+    def test_mapped_lines(self):
+        path = os.path.join(self.tmp.name, "lines.md")
+        self.write(path, "# A\n\ntext\n")
+        self.assertEqual(list(generate_page.mapped_lines(path)), ["# A", "", "text"])
+        self.write(path, "")
+        self.assertEqual(list(generate_page.mapped_lines(path)), [])
+
+    def test_errors_are_reported_after_all_pages(self):
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "No title")
+        with self.assertRaises(RuntimeError):
+            self.generate(jobs=2)
+        # The remaining pages are still generated
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
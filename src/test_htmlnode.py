@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -49,6 +50,10 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             node.to_html()
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_p(self):
@@ -182,5 +187,73 @@ class TestParentNode(unittest.TestCase):
         )
 
 
+class TestStreamingHTML(unittest.TestCase):
+    def setUp(self):
+        self.node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("img", "", {"src": "/a.png"}),
+            ],
+        )
+
+    def test_iter_html_matches_to_html(self):
+        self.assertEqual("".join(self.node.iter_html()), self.node.to_html())
+
+    def test_iter_html_yields_chunks(self):
+        chunks = list(self.node.iter_html())
+        self.assertEqual(chunks[0], "<div>")
+        self.assertEqual(chunks[-1], "</div>")
+        self.assertGreater(len(chunks), 2)
+
+    def test_iter_html_is_lazy(self):
+        chunks = self.node.iter_html()
+        self.assertEqual(next(chunks), "<div>")
+        # A broken child further down only fails once the walk reaches it
+        self.node.children.append(LeafNode("b", None))
+        with self.assertRaises(ValueError):
+            list(chunks)
+
+    def test_write_html(self):
+        fp = io.StringIO()
+        self.node.write_html(fp)
+        self.assertEqual(fp.getvalue(), self.node.to_html())
+
+    def test_iter_html_no_tag_raises_error(self):
+        node = ParentNode(None, [LeafNode("span", "child")])
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
+    def test_render_emits_chunks_in_order(self):
+        chunks = []
+        self.node.render(chunks.append)
+        self.assertEqual(chunks[0], "<div>")
+        self.assertEqual("".join(chunks), self.node.to_html())
+
+
+class TestDeepNesting(unittest.TestCase):
+    def test_deep_nesting_does_not_recurse(self):
+        depth = 100_000
+        node = LeafNode(None, "deep")
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<blockquote>" * 3))
+        self.assertEqual(html.count("<blockquote>"), depth)
+        self.assertEqual(html.count("</blockquote>"), depth)
+        self.assertIn("deep", html)
+
+    def test_wide_list(self):
+        items = [ParentNode("li", [LeafNode(None, str(i))]) for i in range(10_000)]
+        html = ParentNode("ul", items).to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>9999</li></ul>"))
+
+    def test_nested_child_without_tag_raises_error(self):
+        node = ParentNode("div", [ParentNode(None, [LeafNode("b", "x")])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+
 if __name__ == "__main__":
     unittest.main()
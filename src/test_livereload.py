@@ -0,0 +1,83 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+from livereload import RELOAD_SCRIPT, ReloadBroadcaster, start_server
+
+
+class TestReloadBroadcaster(unittest.TestCase):
+    def test_wait_times_out_without_reload(self):
+        reloader = ReloadBroadcaster()
+        self.assertEqual(reloader.wait(0, timeout=0.01), 0)
+
+    def test_wait_returns_after_notify(self):
+        reloader = ReloadBroadcaster()
+        threading.Timer(0.01, reloader.notify).start()
+        self.assertEqual(reloader.wait(0, timeout=5), 1)
+
+
+class TestLiveReloadServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), "w") as f:
+            f.write("<html><body><p>Hi</p></body></html>")
+        with open(os.path.join(self.tmp.name, "index.css"), "w") as f:
+            f.write("body {}")
+        self.server = start_server(self.tmp.name, port=0, host="127.0.0.1")
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path):
+        with urllib.request.urlopen(self.base + path) as response:
+            return response.read()
+
+    def test_html_gets_reload_script(self):
+        body = self.get("/")
+        self.assertEqual(
+            body, b"<html><body><p>Hi</p>" + RELOAD_SCRIPT + b"</body></html>"
+        )
+
+    def test_other_files_are_served_unchanged(self):
+        self.assertEqual(self.get("/index.css"), b"body {}")
+
+    def test_html_on_disk_is_untouched(self):
+        self.get("/index.html")
+        with open(os.path.join(self.tmp.name, "index.html")) as f:
+            self.assertNotIn("EventSource", f.read())
+
+
+class TestLiveReloadBasepath(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "blog"))
+        with open(os.path.join(self.tmp.name, "blog", "index.html"), "w") as f:
+            f.write("<p>Blog</p>")
+        with open(os.path.join(self.tmp.name, "index.css"), "w") as f:
+            f.write("body {}")
+        self.server = start_server(
+            self.tmp.name, port=0, host="127.0.0.1", basepath="/ssg/"
+        )
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}/ssg"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path):
+        with urllib.request.urlopen(self.base + path) as response:
+            return response.read()
+
+    def test_pages_and_assets_are_served_under_basepath(self):
+        self.assertEqual(self.get("/blog/"), b"<p>Blog</p>" + RELOAD_SCRIPT)
+        self.assertEqual(self.get("/index.css"), b"body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
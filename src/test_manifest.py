@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from template import TemplateRegistry
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        self.output = os.path.join(self.tmp.name, "index.html")
+        self.manifest_path = os.path.join(self.tmp.name, ".ssg", "manifest.json")
+        self.write(self.source, "# Hello")
+        self.write(self.output, "<h1>Hello</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_unknown_page_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_recorded_page_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_changed_source_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        self.write(self.source, "# Hello, world")
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_touched_source_with_same_content_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        os.remove(self.output)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_rewritten_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        stat = os.stat(self.output)
+        os.utime(self.output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_save_and_load_round_trip(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.set_config({"basepath": "/"})
+        manifest.record(self.source, self.output)
+        manifest.save()
+
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertEqual(loaded.config, {"basepath": "/"})
+        self.assertTrue(loaded.is_fresh(self.source, self.output))
+
+    def test_load_corrupt_manifest_is_empty(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        self.write(self.manifest_path, "{not json")
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+
+    def test_config_change_invalidates_pages(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.set_config({"basepath": "/"})
+        manifest.record(self.source, self.output)
+        manifest.set_config({"basepath": "/ssg/"})
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_remove_missing(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        os.remove(self.source)
+        removed = manifest.remove_missing()
+        self.assertEqual(list(removed), [self.source])
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.graph.inputs(self.output), [])
+
+    def test_template_change_invalidates_its_pages(self):
+        template_path = os.path.join(self.tmp.name, "template.html")
+        self.write(template_path, "{{ Content }}")
+        templates = TemplateRegistry(template_path).load_all()
+
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.output)
+        # Without a recorded template the page cannot be known to be current
+        self.assertFalse(manifest.is_fresh(self.source, self.output, templates))
+
+        digest = templates.get().digest
+        manifest.graph.record_page(self.output, self.source, template_path, digest)
+        manifest.save()
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertTrue(loaded.is_fresh(self.source, self.output, templates))
+
+        self.write(template_path, "<main>{{ Content }}</main>")
+        templates = TemplateRegistry(template_path).load_all()
+        self.assertFalse(loaded.is_fresh(self.source, self.output, templates))
+
+
+if __name__ == "__main__":
+    unittest.main()
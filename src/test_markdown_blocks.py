@@ -1,6 +1,8 @@
+import io
 import unittest
 
-from markdown_blocks import markdown_to_blocks
+from block_types import BlockType
+from markdown_blocks import markdown_to_blocks, scan_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -102,6 +104,52 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_markdown_to_blocks_fenced_code_with_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```\n\nNext block"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["```\nfirst\n\nsecond\n```", "Next block"])
+
+
+class TestScanBlocks(unittest.TestCase):
+    def test_scan_blocks_types_and_spans(self):
+        md = "# Title\n\nSome text\nmore text\n\n\n- a\n- b\n"
+        blocks = list(scan_blocks(md.split("\n")))
+        self.assertEqual(
+            [(block.block_type, block.start, block.end) for block in blocks],
+            [
+                (BlockType.HEADING, 1, 1),
+                (BlockType.PARAGRAPH, 3, 4),
+                (BlockType.UNORDERED_LIST, 7, 8),
+            ],
+        )
+        self.assertEqual(blocks[1].lines, ["Some text", "more text"])
+
+    def test_scan_blocks_from_file(self):
+        fp = io.StringIO("```\ncode\n\nmore code\n```\n\n> quote\n")
+        blocks = list(scan_blocks(fp))
+        self.assertEqual(blocks[0].block_type, BlockType.CODE)
+        self.assertEqual(blocks[0].text, "```\ncode\n\nmore code\n```")
+        self.assertEqual((blocks[0].start, blocks[0].end), (1, 5))
+        self.assertEqual(blocks[1].block_type, BlockType.QUOTE)
+
+    def test_scan_blocks_is_lazy(self):
+        def lines():
+            yield "First block"
+            yield ""
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(scan_blocks(lines())).text, "First block")
+
+    def test_scan_blocks_unclosed_fence(self):
+        blocks = list(scan_blocks(["```", "code", "", "more", "", ""]))
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0].lines, ["```", "code", "", "more"])
+        self.assertEqual(blocks[0].block_type, BlockType.CODE)
+
+    def test_scan_blocks_whitespace_only_line_separates(self):
+        blocks = list(scan_blocks(["Block 1", "   ", "Block 2"]))
+        self.assertEqual([block.text for block in blocks], ["Block 1", "Block 2"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
-from markdown_to_html import markdown_to_html_node
+from fragment_cache import FragmentCache
+from markdown_to_html import markdown_to_document, markdown_to_html_node
 
 
 class TestMarkdownToHtml(unittest.TestCase):
@@ -22,6 +23,24 @@ class TestMarkdownToHtml(unittest.TestCase):
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_codeblock_with_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```\n"
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first\n\nsecond\n</code></pre></div>",
+        )
+
+    def test_unclosed_codeblock_runs_to_end_of_input(self):
+        md = "```\nx = 1\n\n## Next\n\n- a\n\n"
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>x = 1\n\n## Next\n\n- a\n</code></pre></div>",
+        )
+
     def test_heading(self):
         md = "# This is a heading"
         node = markdown_to_html_node(md)
@@ -112,6 +131,56 @@ class TestMarkdownToHtml(unittest.TestCase):
         self.assertIn("<blockquote>Always remember to <b>have fun</b>!", html)
         self.assertIn("<ol><li>First step</li>", html)
 
+    def test_basepath_applies_to_links_not_code(self):
+        md = '[Home](/) and ![cat](/cat.png)\n\n```\n<a href="/raw">\n```'
+        html = markdown_to_html_node(md, None, "/ssg/").to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/ssg/">Home</a> and <img src="/ssg/cat.png" alt="cat">'
+            '</p><pre><code><a href="/raw">\n</code></pre></div>',
+        )
+
+    def test_basepath_is_part_of_cache_key(self):
+        cache = FragmentCache()
+        md = "[Home](/)"
+        root = markdown_to_html_node(md, cache).to_html()
+        nested = markdown_to_html_node(md, cache, "/ssg/").to_html()
+        self.assertEqual(root, '<div><p><a href="/">Home</a></p></div>')
+        self.assertEqual(nested, '<div><p><a href="/ssg/">Home</a></p></div>')
+
+
+class TestMarkdownToDocument(unittest.TestCase):
+    def test_title_outline_and_html(self):
+        md = "Intro\n\n# Title\n\n## Part _one_\n\ntext\n\n# Second h1\n\n### Deep"
+        document = markdown_to_document(md, None)
+        self.assertEqual(document.title, "Title")
+        self.assertEqual(
+            document.outline,
+            [
+                (1, "Title", 3),
+                (2, "Part _one_", 5),
+                (1, "Second h1", 9),
+                (3, "Deep", 11),
+            ],
+        )
+        self.assertEqual(
+            document.html.to_html(), markdown_to_html_node(md, None).to_html()
+        )
+
+    def test_no_title(self):
+        document = markdown_to_document("## Not an h1\n\nJust content")
+        self.assertIsNone(document.title)
+        self.assertEqual(document.outline, [(2, "Not an h1", 1)])
+
+    def test_heading_in_code_block_is_not_title(self):
+        document = markdown_to_document("```\n# comment\n```\n\n# Real")
+        self.assertEqual(document.title, "Real")
+
+    def test_title_strips_whitespace(self):
+        self.assertEqual(
+            markdown_to_document("#   Hello World   ").title, "Hello World"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
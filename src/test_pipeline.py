@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pipeline
+from pipeline import run_pipeline
+from template import TemplateRegistry
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.write(
+            self.template_path,
+            '<title>{{ Title }}</title><a href="/">{{ Content }}</a>',
+        )
+        self.templates = TemplateRegistry(self.template_path, "/ssg/").load_all()
+        self.pages = []
+        for i in range(20):
+            from_path = os.path.join(self.tmp.name, "content", f"{i}.md")
+            dest_path = os.path.join(self.tmp.name, "docs", "deep", f"{i}.html")
+            self.write(from_path, f"# Page {i}\n\n[home](/)")
+            self.pages.append((from_path, dest_path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_results_in_page_order(self):
+        results = list(run_pipeline(self.pages, self.templates, "/ssg/"))
+        self.assertEqual([page for page, _ in results], self.pages)
+        for _, result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.template, self.template_path)
+            self.assertTrue(result.written)
+        self.assertEqual(
+            self.read(self.pages[3][1]),
+            '<title>Page 3</title><a href="/ssg/"><div><h1>Page 3</h1>'
+            '<p><a href="/ssg/">home</a></p></div></a>',
+        )
+
+    def test_errors_are_reported_per_page(self):
+        os.remove(self.pages[2][0])
+        self.write(self.pages[5][0], "no title")
+        results = dict(run_pipeline(self.pages, self.templates, "/ssg/"))
+        self.assertTrue(results[self.pages[2]].error.startswith("FileNotFoundError"))
+        self.assertEqual(
+            results[self.pages[5]].error, "ValueError: No h1 header found in markdown"
+        )
+        self.assertFalse(os.path.exists(self.pages[5][1]))
+        self.assertIsNone(results[self.pages[6]].error)
+
+    def test_write_errors_are_reported(self):
+        # A directory where the output file should go
+        os.makedirs(self.pages[4][1])
+        results = dict(run_pipeline(self.pages, self.templates))
+        self.assertTrue(results[self.pages[4]].error.startswith("IsADirectoryError"))
+        self.assertIsNone(results[self.pages[5]].error)
+
+    def test_rendering_waits_for_slow_writes(self):
+        # Pages rendered but not yet written never exceed the backlog, plus
+        # the one page being rendered while the renderer waits for a slot
+        rendered = written = peak = 0
+        lock = threading.Lock()
+        parse_page, write_output = pipeline.parse_page, pipeline.write_output
+
+        def counting_parse(*args):
+            nonlocal rendered, peak
+            with lock:
+                rendered += 1
+                peak = max(peak, rendered - written)
+            return parse_page(*args)
+
+        def slow_write(dest_path, output, if_changed=False):
+            nonlocal written
+            time.sleep(0.005)
+            write_output(dest_path, output, if_changed)
+            with lock:
+                written += 1
+
+        with mock.patch.object(pipeline, "parse_page", counting_parse):
+            with mock.patch.object(pipeline, "write_output", slow_write):
+                results = list(
+                    run_pipeline(
+                        self.pages, self.templates, write_threads=1, write_backlog=3
+                    )
+                )
+        self.assertTrue(all(result.error is None for _, result in results))
+        self.assertLessEqual(peak, 4)
+        self.assertTrue(all(os.path.exists(dest) for _, dest in self.pages))
+
+    def test_pages_are_streamed_without_rendering(self):
+        template = self.templates.get()
+        with mock.patch.object(
+            type(template), "render", side_effect=AssertionError("rendered")
+        ):
+            results = list(run_pipeline(self.pages, self.templates, "/ssg/"))
+        self.assertTrue(all(result.error is None for _, result in results))
+        self.assertIn("<h1>Page 3</h1>", self.read(self.pages[3][1]))
+
+    def test_large_pages_are_written_before_the_next_is_parsed(self):
+        # Mapped sources are never queued behind the writers
+        self.write(self.pages[0][0], "# Large\n\n" + "word " * 100)
+        parse_page = pipeline.parse_page
+        seen = []
+
+        def checking_parse(markdown, *args):
+            seen.append(os.path.exists(self.pages[0][1]))
+            return parse_page(markdown, *args)
+
+        with mock.patch("generate_page.MMAP_THRESHOLD", 256):
+            with mock.patch.object(pipeline, "parse_page", checking_parse):
+                results = dict(run_pipeline(self.pages[:2], self.templates))
+        self.assertEqual(seen, [False, True])
+        self.assertTrue(results[self.pages[0]].written)
+        self.assertIn("<h1>Large</h1>", self.read(self.pages[0][1]))
+
+    def test_profile_stages(self):
+        results = list(run_pipeline(self.pages[:2], self.templates, profile=True))
+        page_profile = results[0][1].profile
+        self.assertEqual(
+            list(page_profile.stages), ["read", "parse", "render", "write"]
+        )
+        self.assertEqual(page_profile.bytes_in, os.path.getsize(self.pages[0][0]))
+        self.assertEqual(page_profile.bytes_out, os.path.getsize(self.pages[0][1]))
+
+    def test_if_changed_skips_identical_outputs(self):
+        list(run_pipeline(self.pages, self.templates, "/ssg/"))
+        os.utime(self.pages[0][1], ns=(0, 0))
+        self.write(self.pages[1][0], "# Edited")
+
+        results = dict(
+            run_pipeline(self.pages, self.templates, "/ssg/", if_changed=True)
+        )
+        self.assertFalse(results[self.pages[0]].written)
+        self.assertEqual(os.stat(self.pages[0][1]).st_mtime_ns, 0)
+        self.assertTrue(results[self.pages[1]].written)
+        self.assertIn("Edited", self.read(self.pages[1][1]))
+
+    def test_stopping_early_releases_reader(self):
+        results = run_pipeline(self.pages, self.templates, read_ahead=1)
+        next(results)
+        results.close()
+        self.assertEqual(
+            [t for t in threading.enumerate() if t.name.startswith("ssg-writer")], []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiler import BuildProfile, PageProfile
+
+
+def make_profile(path, **stages):
+    profile = PageProfile(path)
+    profile.stages = stages
+    return profile
+
+
+class TestPageProfile(unittest.TestCase):
+    def test_mark_accumulates(self):
+        profile = PageProfile("index.md")
+        profile.mark("read")
+        profile.mark("parse")
+        profile.mark("read")
+        self.assertEqual(list(profile.stages), ["read", "parse"])
+        self.assertAlmostEqual(profile.total, sum(profile.stages.values()))
+
+
+class TestBuildProfile(unittest.TestCase):
+    def setUp(self):
+        self.profile = BuildProfile()
+        self.profile.add(make_profile("a.md", read=0.1, parse=0.2))
+        self.profile.add(make_profile("b.md", read=0.1, parse=0.9))
+        self.profile.add(make_profile("c.md", read=0.5, parse=0.1))
+
+    def test_slowest(self):
+        slowest = self.profile.slowest(2)
+        self.assertEqual([page.path for page in slowest], ["b.md", "c.md"])
+
+    def test_stage_totals(self):
+        totals = self.profile.stage_totals()
+        self.assertAlmostEqual(totals["read"], 0.7)
+        self.assertAlmostEqual(totals["parse"], 1.2)
+        self.assertEqual(totals["write"], 0.0)
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report", "profile.json")
+            self.profile.save(path)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(len(report["pages"]), 3)
+        self.assertAlmostEqual(report["total"], 1.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
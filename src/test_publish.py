@@ -0,0 +1,117 @@
+import errno
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import publish
+from publish import link_duplicates, publish_file
+
+
+class TestPublishFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "a.png")
+        self.dst = os.path.join(self.tmp.name, "out.png")
+        self.write(self.src, b"\x89PNG" * 1000)
+        os.utime(self.src, ns=(10**9, 10**9))
+        publish._unsupported.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_link_shares_the_file(self):
+        self.assertEqual(publish_file(self.src, self.dst, link=True), "hardlink")
+        self.assertTrue(os.path.samefile(self.src, self.dst))
+
+    def test_copy_is_independent_and_keeps_mtime(self):
+        method = publish_file(self.src, self.dst)
+        self.assertNotEqual(method, "hardlink")
+        self.assertFalse(os.path.samefile(self.src, self.dst))
+        self.assertEqual(self.read(self.dst), self.read(self.src))
+        self.assertEqual(os.stat(self.dst).st_mtime_ns, 10**9)
+
+    def test_replaces_existing_output(self):
+        self.write(self.dst, b"old")
+        publish_file(self.src, self.dst, link=True)
+        self.assertEqual(self.read(self.dst), self.read(self.src))
+        self.assertFalse(os.path.exists(f"{self.dst}.ssg-tmp"))
+
+    def test_each_fallback_copies_the_data(self):
+        for name, method in publish.PUBLISH_METHODS[1:]:
+            with self.subTest(name):
+                try:
+                    method(self.src, self.dst)
+                except OSError as e:
+                    self.assertIn(e.errno, publish.UNSUPPORTED)
+                    continue
+                self.assertEqual(self.read(self.dst), self.read(self.src))
+
+    def test_falls_back_and_remembers_unsupported_methods(self):
+        calls = []
+
+        def unsupported(src_path, dst_path):
+            calls.append(dst_path)
+            raise OSError(errno.EXDEV, "cross-device link")
+
+        methods = (("hardlink", unsupported), ("sendfile", publish.sendfile_file))
+        with mock.patch.object(publish, "PUBLISH_METHODS", methods):
+            self.assertEqual(publish_file(self.src, self.dst, link=True), "sendfile")
+            publish_file(self.src, self.dst, link=True)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.read(self.dst), self.read(self.src))
+
+    def test_short_kernel_copy_falls_back(self):
+        methods = (("copy_file_range", publish.copy_range_file),)
+        with (
+            mock.patch.object(publish, "PUBLISH_METHODS", methods),
+            mock.patch.object(
+                publish.os, "copy_file_range", return_value=0, create=True
+            ),
+        ):
+            self.assertEqual(publish_file(self.src, self.dst, link=True), "copy")
+        self.assertEqual(self.read(self.dst), self.read(self.src))
+
+    def test_real_errors_are_raised(self):
+        def broken(src_path, dst_path):
+            raise OSError(errno.EIO, "I/O error")
+
+        with mock.patch.object(publish, "PUBLISH_METHODS", (("hardlink", broken),)):
+            with self.assertRaises(OSError):
+                publish_file(self.src, self.dst, link=True)
+
+
+class TestLinkDuplicates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_links_identical_files(self):
+        a = self.write("a.png", b"same")
+        b = self.write("b.png", b"same")
+        c = self.write("c.png", b"diff")
+        d = self.write("d.png", b"longer")
+        self.assertEqual(link_duplicates([a, b, c, d]), 1)
+        self.assertTrue(os.path.samefile(a, b))
+        self.assertFalse(os.path.samefile(a, c))
+        self.assertEqual(link_duplicates([a, b, c, d]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
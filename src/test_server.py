@@ -0,0 +1,190 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from server import (
+    FileCache,
+    accepted_encodings,
+    etag_matches,
+    make_server,
+    parse_range,
+)
+
+CSS = b"body { color: red; }\n" * 50
+
+
+class TestParsing(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+
+    def test_parse_range_unsatisfiable(self):
+        self.assertEqual(parse_range("bytes=100-", 100), ())
+        self.assertEqual(parse_range("bytes=-0", 100), ())
+
+    def test_parse_range_ignored(self):
+        self.assertIsNone(parse_range("items=0-9", 100))
+        self.assertIsNone(parse_range("bytes=0-9,20-29", 100))
+        self.assertIsNone(parse_range("bytes=9-0", 100))
+        self.assertIsNone(parse_range("bytes=a-b", 100))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings("gzip, deflate;q=0.5, zstd;q=0"), {"gzip", "deflate"}
+        )
+        self.assertEqual(accepted_encodings(""), set())
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.css")
+        with open(self.path, "wb") as f:
+            f.write(CSS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_until_file_changes(self):
+        cache = FileCache()
+        first = cache.get(self.path)
+        self.assertIs(cache.get(self.path), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        with open(self.path, "wb") as f:
+            f.write(b"body {}")
+        self.assertEqual(cache.get(self.path).body, b"body {}")
+
+    def test_bounded_by_bytes(self):
+        other = os.path.join(self.tmp.name, "b.css")
+        with open(other, "wb") as f:
+            f.write(CSS)
+        cache = FileCache(max_bytes=len(CSS) + 1)
+        cache.get(self.path)
+        cache.get(other)
+        self.assertEqual(list(cache.files), [other])
+        self.assertEqual(cache.size, len(CSS))
+
+    def test_large_files_are_not_kept(self):
+        cache = FileCache(max_file=10)
+        self.assertIsNone(cache.get(self.path).body)
+        self.assertEqual(len(cache), 0)
+
+
+class TestStaticServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.css = os.path.join(self.tmp.name, "index.css")
+        self.write(self.css, CSS)
+        self.write(os.path.join(self.tmp.name, "blog", "index.html"), b"<p>Blog</p>")
+        self.server = make_server(self.tmp.name, 0, "127.0.0.1", basepath="/ssg/")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}/ssg"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def request(self, path, method="GET", **headers):
+        # Returns (status, headers, body), including for error statuses
+        request = urllib.request.Request(
+            self.base + path, method=method, headers=headers
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_serves_under_basepath(self):
+        status, headers, body = self.request("/blog/")
+        self.assertEqual((status, body), (200, b"<p>Blog</p>"))
+        self.assertEqual(headers["Content-Type"], "text/html")
+
+    def test_etag_revalidation(self):
+        status, headers, _ = self.request("/index.css")
+        self.assertEqual(status, 200)
+        etag = headers["ETag"]
+        status, _, body = self.request("/index.css", **{"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+
+        os.utime(self.css, ns=(10**9, 10**9))
+        status, _, body = self.request("/index.css", **{"If-None-Match": etag})
+        self.assertEqual((status, body), (200, CSS))
+
+    def test_range(self):
+        status, headers, body = self.request("/index.css", Range="bytes=5-9")
+        self.assertEqual((status, body), (206, CSS[5:10]))
+        self.assertEqual(headers["Content-Range"], f"bytes 5-9/{len(CSS)}")
+
+        status, headers, _ = self.request("/index.css", Range="bytes=5000-")
+        self.assertEqual(status, 416)
+        self.assertEqual(headers["Content-Range"], f"bytes */{len(CSS)}")
+
+    def test_stale_if_range_sends_everything(self):
+        status, _, body = self.request(
+            "/index.css", Range="bytes=5-9", **{"If-Range": '"old"'}
+        )
+        self.assertEqual((status, body), (200, CSS))
+
+    def test_large_files_are_sent_from_disk(self):
+        self.server.RequestHandlerClass.cache = FileCache(max_file=10)
+        status, _, body = self.request("/index.css", Range="bytes=-4")
+        self.assertEqual((status, body), (206, CSS[-4:]))
+        self.assertEqual(self.request("/index.css")[2], CSS)
+
+    def test_head_has_no_body(self):
+        status, headers, body = self.request("/index.css", method="HEAD")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(headers["Content-Length"], str(len(CSS)))
+
+    def test_gzip_sibling(self):
+        self.write(self.css + ".gz", gzip.compress(CSS))
+        stat = os.stat(self.css)
+        os.utime(self.css + ".gz", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        status, headers, body = self.request(
+            "/index.css", **{"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Content-Type"], "text/css")
+        self.assertEqual(gzip.decompress(body), CSS)
+
+        _, headers, body = self.request("/index.css")
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertEqual(body, CSS)
+
+    def test_stale_gzip_sibling_is_ignored(self):
+        self.write(self.css + ".gz", gzip.compress(b"old"))
+        os.utime(self.css + ".gz", ns=(10**9, 10**9))
+        _, headers, body = self.request("/index.css", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(headers["Content-Encoding"])
+        self.assertEqual(body, CSS)
+
+    def test_missing_file(self):
+        self.assertEqual(self.request("/nope.css")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
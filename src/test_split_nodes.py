@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from textnode import TextNode, TextType
@@ -389,6 +390,31 @@ class TestSplitNodesLink(unittest.TestCase):
         )
 
 
+def best_time(func, *args):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestSplitScaling(unittest.TestCase):
+    def assert_linear(self, func, make_text):
+        small = [TextNode(make_text(10_000), TextType.TEXT)]
+        large = [TextNode(make_text(40_000), TextType.TEXT)]
+        self.assertEqual(len(func(large)), 80_000)
+        # 4x the input: linear is ~4x the time, quadratic ~16x
+        ratio = best_time(func, large) / best_time(func, small)
+        self.assertLess(ratio, 10)
+
+    def test_split_links_scales_linearly(self):
+        self.assert_linear(split_nodes_link, lambda n: "[post](/blog/post/) " * n)
+
+    def test_split_images_scales_linearly(self):
+        self.assert_linear(split_nodes_image, lambda n: "![pic](/images/a.png) " * n)
+
+
 class TestTextToTextnodes(unittest.TestCase):
     def test_text_to_textnodes_full(self):
         text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
@@ -593,6 +619,63 @@ class TestTextToTextnodes(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_unclosed_delimiter_is_text(self):
+        text = "This is **not closed and `neither"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual([TextNode(text, TextType.TEXT)], nodes)
+
+    def test_text_to_textnodes_unclosed_inside_bold(self):
+        text = "**bold with a stray _** then text"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("bold with a stray _", TextType.BOLD),
+                TextNode(" then text", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_italic_around_bold(self):
+        text = "_italic **with bold** inside_"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [TextNode("italic **with bold** inside", TextType.ITALIC)],
+            nodes,
+        )
+
+    def test_text_to_textnodes_code_keeps_markup(self):
+        text = "Use `a **b** _c_` here"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("a **b** _c_", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_underscores_in_link(self):
+        text = "See [my_page](https://example.com/a_b_c)"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("my_page", TextType.LINK, "https://example.com/a_b_c"),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_many_delimiters(self):
+        text = "_" * 100001
+        nodes = text_to_textnodes(text)
+        self.assertListEqual([TextNode("_", TextType.TEXT)], nodes)
+
+    def test_text_to_textnodes_many_unclosed_brackets(self):
+        text = "[a](" * 20000
+        nodes = text_to_textnodes(text)
+        self.assertListEqual([TextNode(text, TextType.TEXT)], nodes)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, TemplateRegistry, extract_layout, extract_layout_lines
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        html = template.render({"Title": "Hi", "Content": "<p>Body</p>"})
+        self.assertEqual(html, "<title>Hi</title><main><p>Body</p></main>")
+
+    def test_render_splits_once(self):
+        template = Template("a{{ Title }}b{{ Content }}c")
+        self.assertEqual(template.chunks, ["a", "b", "c"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi - Hi")
+
+    def test_render_leaves_unknown_slots(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Author }}")
+
+    def test_render_does_not_expand_values(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        html = template.render({"Title": "{{ Content }}", "Content": "x"})
+        self.assertEqual(html, "{{ Content }}|x")
+
+    def test_basepath_applied_at_load(self):
+        template = Template(
+            '<link href="/index.css"><script src="//cdn.example/a.js"></script>'
+            '<a href="https://example.com">{{ Content }}</a>',
+            basepath="/ssg/",
+        )
+        self.assertEqual(
+            template.render({"Content": 'href="/x"'}),
+            '<link href="/ssg/index.css"><script src="//cdn.example/a.js"></script>'
+            '<a href="https://example.com">href="/x"</a>',
+        )
+
+    def test_basepath_does_not_change_digest(self):
+        text = '<a href="/">{{ Content }}</a>'
+        self.assertEqual(Template(text).digest, Template(text, basepath="/ssg/").digest)
+
+    def test_write_streams_nodes(self):
+        template = Template("<main>{{ Content }}</main>")
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")])
+        chunks = []
+        fp = type("Sink", (), {"write": lambda self, chunk: chunks.append(chunk)})()
+        template.write(fp, {"Content": node})
+        self.assertEqual("".join(chunks), "<main><p><b>Bold</b> text</p></main>")
+        self.assertGreater(len(chunks), 3)
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.default_path = os.path.join(self.tmp.name, "template.html")
+        with open(self.default_path, "w") as f:
+            f.write("default {{ Content }}")
+        os.mkdir(os.path.join(self.tmp.name, "layouts"))
+        with open(os.path.join(self.tmp.name, "layouts", "post.html"), "w") as f:
+            f.write("post {{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_caches_templates(self):
+        registry = TemplateRegistry(self.default_path)
+        self.assertIs(registry.get(), registry.get())
+
+    def test_get_layout(self):
+        registry = TemplateRegistry(self.default_path)
+        self.assertEqual(registry.get("post").render({"Content": "x"}), "post x")
+
+    def test_get_unknown_layout_raises_error(self):
+        registry = TemplateRegistry(self.default_path)
+        with self.assertRaises(ValueError):
+            registry.get("missing")
+
+    def test_load_all(self):
+        registry = TemplateRegistry(self.default_path).load_all()
+        self.assertEqual(len(registry.fingerprint()), 2)
+
+
+class TestExtractLayout(unittest.TestCase):
+    def test_extract_layout(self):
+        layout, markdown = extract_layout("<!-- layout: post -->\n# Title")
+        self.assertEqual(layout, "post")
+        self.assertEqual(markdown, "# Title")
+
+    def test_extract_layout_missing(self):
+        layout, markdown = extract_layout("# Title\n<!-- layout: post -->")
+        self.assertIsNone(layout)
+        self.assertEqual(markdown, "# Title\n<!-- layout: post -->")
+
+    def test_extract_layout_lines(self):
+        layout, lines = extract_layout_lines(iter(["<!-- layout: post -->", "# Title"]))
+        self.assertEqual(layout, "post")
+        self.assertEqual(list(lines), ["# Title"])
+
+    def test_extract_layout_lines_missing(self):
+        layout, lines = extract_layout_lines(iter(["# Title", "text"]))
+        self.assertIsNone(layout)
+        self.assertEqual(list(lines), ["# Title", "text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
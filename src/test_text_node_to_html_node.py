@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, text_node_to_html_node, with_basepath
 from htmlnode import LeafNode
 
 
@@ -64,6 +64,24 @@ class TestTextNodeToHtmlNode(unittest.TestCase):
             '<img src="image.jpg" alt="alt text">',
         )
 
+    def test_link_with_basepath(self):
+        node = TextNode("Home", TextType.LINK, "/blog/")
+        html_node = text_node_to_html_node(node, "/ssg/")
+        self.assertEqual(html_node.to_html(), '<a href="/ssg/blog/">Home</a>')
+
+    def test_image_with_basepath(self):
+        node = TextNode("alt", TextType.IMAGE, "/images/a.png")
+        html_node = text_node_to_html_node(node, "/ssg/")
+        self.assertEqual(html_node.to_html(), '<img src="/ssg/images/a.png" alt="alt">')
+
+    def test_with_basepath_leaves_other_urls(self):
+        self.assertEqual(with_basepath("https://boot.dev", "/ssg/"), "https://boot.dev")
+        self.assertEqual(with_basepath("image.jpg", "/ssg/"), "image.jpg")
+        self.assertEqual(
+            with_basepath("//cdn.example/a.js", "/ssg/"), "//cdn.example/a.js"
+        )
+        self.assertEqual(with_basepath("/a", "/"), "/a")
+
     def test_unknown_type_raises_error(self):
         node = TextNode("text", TextType.TEXT)
         node.text_type = "unknown"
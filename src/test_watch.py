@@ -0,0 +1,191 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from inotify import Inotify
+from manifest import BuildManifest
+from watch import (
+    InotifyWatcher,
+    changed_paths,
+    load_templates,
+    open_watcher,
+    rebuild,
+    take_snapshot,
+    update_snapshot,
+)
+
+
+class TestChangedPaths(unittest.TestCase):
+    def test_changed_paths(self):
+        old = {"a.md": (1, 10), "b.md": (1, 10), "c.md": (1, 10)}
+        new = {"a.md": (1, 10), "b.md": (2, 10), "d.md": (1, 10)}
+        self.assertEqual(changed_paths(old, new), ["b.md", "c.md", "d.md"])
+
+
+class TestRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.write(os.path.join("content", "index.md"), "# Home")
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.manifest = BuildManifest()
+        self.templates = load_templates(self.manifest, "/")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def rebuild(self, changed):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.templates = rebuild(changed, self.templates, self.manifest)
+        return out.getvalue()
+
+    def test_snapshot_covers_sources(self):
+        snapshot = take_snapshot(self.templates)
+        self.assertIn("template.html", snapshot)
+        self.assertIn(os.path.join("content", "blog", "index.md"), snapshot)
+        self.assertIn(os.path.join("static", "index.css"), snapshot)
+
+    def test_update_snapshot_restats_reported_paths(self):
+        snapshot = take_snapshot(self.templates)
+        self.write(os.path.join("content", "index.md"), "# Home, edited")
+        self.write(os.path.join("content", "new", "a", "index.md"), "# New")
+        shutil.rmtree(os.path.join("content", "blog"))
+        reported = [
+            os.path.join("content", "index.md"),
+            os.path.join("content", "new"),
+            os.path.join("content", "blog"),
+        ]
+        self.assertEqual(
+            update_snapshot(snapshot, reported), take_snapshot(self.templates)
+        )
+        # The old snapshot is left for the diff
+        self.assertIn(os.path.join("content", "blog", "index.md"), snapshot)
+
+    def test_content_change_rebuilds_only_that_page(self):
+        log = self.rebuild([os.path.join("content", "blog", "index.md")])
+        self.assertEqual(log.count("Generating page"), 1)
+        self.assertEqual(
+            self.read(os.path.join("docs", "blog", "index.html")),
+            "<main><div><h1>Blog</h1></div></main>",
+        )
+
+    def test_template_change_rebuilds_every_page(self):
+        self.write("template.html", "<body>{{ Content }}</body>")
+        log = self.rebuild(["template.html"])
+        self.assertEqual(log.count("Generating page"), 2)
+        self.assertEqual(
+            self.read(os.path.join("docs", "index.html")),
+            "<body><div><h1>Home</h1></div></body>",
+        )
+
+    def test_unchanged_outputs_are_not_rewritten(self):
+        page = os.path.join("content", "blog", "index.md")
+        self.rebuild([page])
+        self.write(page, "# Blog\n\n\n")
+        log = self.rebuild([page])
+        self.assertEqual(log.count("Generating page"), 0)
+        self.assertIn("Pages written: 0, unchanged and skipped: 1", log)
+
+    def test_unused_layout_change_rebuilds_nothing(self):
+        self.rebuild(["template.html"])
+        layout = os.path.join("layouts", "unused.html")
+        self.write(layout, "{{ Content }}")
+        self.assertEqual(self.rebuild([layout]), "")
+
+    def test_layout_change_rebuilds_only_its_pages(self):
+        layout = os.path.join("layouts", "post.html")
+        self.write(layout, "<article>{{ Content }}</article>")
+        self.write(
+            os.path.join("content", "blog", "index.md"), "<!-- layout: post -->\n# Blog"
+        )
+        self.rebuild(["template.html", layout])
+
+        self.write(layout, "<section>{{ Content }}</section>")
+        log = self.rebuild([layout])
+        self.assertEqual(log.count("Generating page"), 1)
+        self.assertIn(os.path.join("docs", "blog", "index.html"), log)
+        self.assertEqual(
+            self.read(os.path.join("docs", "blog", "index.html")),
+            "<section><div><h1>Blog</h1></div></section>",
+        )
+
+    def test_static_changes_are_synced(self):
+        css = os.path.join("static", "index.css")
+        self.rebuild([css])
+        self.assertTrue(os.path.exists(os.path.join("docs", "index.css")))
+
+        os.remove(css)
+        self.rebuild([css])
+        self.assertFalse(os.path.exists(os.path.join("docs", "index.css")))
+        self.assertEqual(self.manifest.assets, [])
+
+    def test_removed_page_output_is_deleted(self):
+        page = os.path.join("content", "blog", "index.md")
+        self.rebuild([page])
+        os.remove(page)
+        self.rebuild([page])
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "index.html")))
+
+
+@unittest.skipIf(Inotify.open() is None, "inotify is not available")
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog")
+        self.templates = load_templates(BuildManifest(), "/")
+        self.watcher = open_watcher(self.templates)
+
+    def tearDown(self):
+        self.watcher.close()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_uses_inotify(self):
+        self.assertIsInstance(self.watcher, InotifyWatcher)
+
+    def test_reports_written_files(self):
+        page = os.path.join("content", "blog", "index.md")
+        self.write(page, "# Edited")
+        self.write("template.html", "<body>{{ Content }}</body>")
+        self.assertEqual(self.watcher.wait(1), {page, "template.html"})
+
+    def test_new_directories_are_watched(self):
+        self.write(os.path.join("layouts", "post.html"), "{{ Content }}")
+        self.assertIn("layouts", self.watcher.wait(1))
+        layout = os.path.join("layouts", "post.html")
+        self.write(layout, "<article>{{ Content }}</article>")
+        self.assertEqual(self.watcher.wait(1), {layout})
+
+    def test_unwatched_files_are_ignored(self):
+        self.write(os.path.join("docs", "index.html"), "<p>built</p>")
+        self.write("notes.txt", "not a source")
+        self.assertEqual(self.watcher.wait(0.1), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -30,7 +32,7 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node):
+def text_node_to_html_node(text_node, basepath="/"):
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -41,8 +43,18 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            href = with_basepath(text_node.url, basepath)
+            return LeafNode("a", text_node.text, {"href": href})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            src = with_basepath(text_node.url, basepath)
+            return LeafNode("img", "", {"src": src, "alt": text_node.text})
         case _:
             raise ValueError(f"Unknown text type: {text_node.text_type}")
+
+
+def with_basepath(url, basepath="/"):
+    # Root-relative URLs move under the basepath; external, relative and
+    # protocol-relative (//host) URLs are left alone
+    if basepath == "/" or not url.startswith("/") or url.startswith("//"):
+        return url
+    return basepath + url[1:]
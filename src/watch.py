@@ -0,0 +1,294 @@
+import os
+import time
+from stat import S_ISREG
+from copy_static import copy_asset, remove_asset, sync_static
+from fragment_cache import FRAGMENT_CACHE, FragmentStore, prune_fragments
+from generate_pages import (
+    build_config,
+    collect_pages,
+    generate_pages,
+    page_dest_path,
+    remove_stale_pages,
+)
+from inotify import IN_CREATE, IN_ISDIR, IN_MOVED_TO, IN_Q_OVERFLOW, Inotify
+from livereload import start_server
+from manifest import BuildManifest
+from publish import remove_siblings
+from template import TemplateRegistry
+
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+DEST_DIR = "docs"
+TEMPLATE_PATH = "template.html"
+
+
+def watch(basepath="/", port=8888, interval=0.05, jobs=1):
+    manifest = BuildManifest.load()
+    templates = load_templates(manifest, basepath)
+    FRAGMENT_CACHE.store = FragmentStore()
+
+    # Start from an incremental build so the first edit is the only work left
+    sync_static(STATIC_DIR, DEST_DIR, manifest)
+    generate_pages(
+        stale_pages(manifest, templates),
+        templates,
+        basepath,
+        manifest,
+        jobs,
+        if_changed=True,
+    )
+    remove_stale_pages(manifest)
+    prune_fragments(FRAGMENT_CACHE.store)
+
+    server = start_server(DEST_DIR, port, basepath=basepath)
+    print(
+        f"Watching for changes, serving {DEST_DIR} at http://localhost:{port}{basepath}"
+    )
+
+    # Watch before the first snapshot, so nothing changed in between is lost
+    watcher = open_watcher(templates, interval)
+    snapshot = take_snapshot(templates)
+    try:
+        while True:
+            paths = watcher.wait()
+            if paths is None:
+                current = take_snapshot(templates)
+            else:
+                current = update_snapshot(snapshot, paths)
+            changed = changed_paths(snapshot, current)
+            snapshot = current
+            if not changed:
+                continue
+
+            start = time.perf_counter()
+            try:
+                templates = rebuild(changed, templates, manifest, basepath, jobs)
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+                continue
+            server.reloader.notify()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {len(changed)} changed file(s) in {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        server.shutdown()
+        server.server_close()
+        manifest.save()
+
+
+def load_templates(manifest, basepath):
+    templates = TemplateRegistry(TEMPLATE_PATH, basepath).load_all()
+    manifest.set_config(build_config(basepath))
+    return templates
+
+
+def stale_pages(manifest, templates):
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in collect_pages(CONTENT_DIR, DEST_DIR)
+        if not manifest.is_fresh(from_path, dest_path, templates)
+    ]
+
+
+class PollingWatcher:
+    # Rescans every watched file each interval. Portable, but the scan grows
+    # with the site: about 300 ms at 30k posts.
+    def __init__(self, interval):
+        self.interval = interval
+
+    def wait(self):
+        # None: anything may have changed
+        time.sleep(self.interval)
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # Asks the kernel which files changed, so an idle watch costs nothing
+    # and an edit is seen as soon as it is saved, however large the site.
+    # Source directories are watched recursively, and their parents only
+    # for the roots and the template themselves, so the roots and layouts/
+    # can come and go.
+    def __init__(self, inotify, roots, files, interval):
+        self.inotify = inotify
+        self.interval = interval
+        self.polling = False
+        # Parent directory -> names in it that are watched
+        self.parents = {}
+        for path in (*roots, *files):
+            parent = os.path.dirname(path) or "."
+            self.parents.setdefault(parent, set()).add(os.path.basename(path))
+        for parent in self.parents:
+            inotify.add_watch(parent)
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, root):
+        try:
+            self.inotify.add_watch(root)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for dir_path, dir_names, _ in os.walk(root):
+            for dir_name in dir_names:
+                try:
+                    self.inotify.add_watch(os.path.join(dir_path, dir_name))
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+
+    def wait(self, timeout=None):
+        # Returns the paths to restat, or None when events were lost and
+        # everything has to be rescanned
+        if self.polling:
+            time.sleep(self.interval)
+            return None
+        paths = set()
+        for directory, name, mask in self.inotify.read(timeout):
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if directory is None:
+                continue
+            watched = self.parents.get(directory)
+            if watched is not None and name not in watched:
+                continue
+            path = join_event_path(directory, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self.add_tree(path)
+                except OSError as e:
+                    # Most likely fs.inotify.max_user_watches
+                    print(f"Cannot watch {path} ({e}), polling from now on")
+                    self.polling = True
+                    return None
+            elif mask & IN_CREATE:
+                # A new file is reported again once it is written and closed
+                continue
+            paths.add(path)
+        return paths
+
+    def close(self):
+        self.inotify.close()
+
+
+def open_watcher(templates, interval=0.05):
+    # inotify where the platform has it, polling everywhere else
+    inotify = Inotify.open()
+    if inotify is not None:
+        roots = (CONTENT_DIR, STATIC_DIR, templates.layout_dir)
+        try:
+            return InotifyWatcher(inotify, roots, (TEMPLATE_PATH,), interval)
+        except OSError as e:
+            inotify.close()
+            print(f"Cannot watch with inotify ({e}), polling instead")
+    return PollingWatcher(interval)
+
+
+def join_event_path(directory, name):
+    # Paths relative to the working directory are spelled as in a snapshot
+    if not name:
+        return directory
+    return name if directory == "." else os.path.join(directory, name)
+
+
+def take_snapshot(templates):
+    # Maps every watched file to (mtime, size)
+    snapshot = {}
+    for root in (CONTENT_DIR, STATIC_DIR, templates.layout_dir):
+        scan_tree(root, snapshot)
+    try:
+        stat = os.stat(TEMPLATE_PATH)
+        snapshot[TEMPLATE_PATH] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+    return snapshot
+
+
+def scan_tree(root, snapshot):
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                scan_tree(entry.path, snapshot)
+            elif entry.is_file():
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+
+def update_snapshot(snapshot, paths):
+    # Restats only the paths a watcher reported, in a copy of snapshot
+    current = dict(snapshot)
+    for path in paths:
+        known_file = current.pop(path, None) is not None
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            stat = None
+        if stat is not None and S_ISREG(stat.st_mode):
+            current[path] = (stat.st_mtime_ns, stat.st_size)
+        elif not known_file:
+            # A directory appeared, went away or moved; rescan just that
+            prefix = path + os.sep
+            for old_path in [p for p in current if p.startswith(prefix)]:
+                del current[old_path]
+            scan_tree(path, current)
+    return current
+
+
+def changed_paths(old, new):
+    # Added, modified and removed files
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    changed.update(path for path in old if path not in new)
+    return sorted(changed)
+
+
+def rebuild(changed, templates, manifest, basepath="/", jobs=1):
+    # Returns the template registry to use from now on
+    layout_prefix = templates.layout_dir + os.sep
+    content_prefix = CONTENT_DIR + os.sep
+    static_prefix = STATIC_DIR + os.sep
+
+    template_changed = any(
+        path == TEMPLATE_PATH or path.startswith(layout_prefix) for path in changed
+    )
+    if template_changed:
+        # The dependency graph knows which pages used each template, so only
+        # those are rebuilt
+        templates = load_templates(manifest, basepath)
+        pages = stale_pages(manifest, templates)
+    else:
+        pages = [
+            (path, page_dest_path(path, CONTENT_DIR, DEST_DIR))
+            for path in changed
+            if path.startswith(content_prefix)
+            and path.endswith(".md")
+            and os.path.isfile(path)
+        ]
+
+    assets = set(manifest.assets)
+    for path in changed:
+        if not path.startswith(static_prefix):
+            continue
+        rel_path = os.path.relpath(path, STATIC_DIR)
+        dst_path = os.path.join(DEST_DIR, rel_path)
+        if os.path.isfile(path):
+            copy_asset(path, dst_path)
+            manifest.graph.record_asset(dst_path, path)
+            remove_siblings(dst_path, manifest.graph)
+            assets.add(rel_path)
+        else:
+            remove_asset(dst_path, DEST_DIR)
+            manifest.graph.remove_output(dst_path)
+            remove_siblings(dst_path, manifest.graph)
+            assets.discard(rel_path)
+    manifest.assets = sorted(assets)
+
+    # A template edit re-renders every page; only rewrite the ones it changed
+    generate_pages(pages, templates, basepath, manifest, jobs, if_changed=True)
+    remove_stale_pages(manifest)
+    return templates